@@ -0,0 +1,217 @@
+"""
+Scaling benchmark for database.py.
+
+Fills a temporary database with a synthetic library (favorites, history, collections and their items),
+then times every public method of Favorite, History, Continue and Collections plus search_library.
+Results are printed and written as JSON so runs can be compared across commits.
+Runs headless: only sqlite3 and the database module are needed, no wx display.
+
+Usage: python benchmarks/db_benchmark.py [--favorites N] [--history N] [--collections N] [--items N] [--repeat N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+import database
+
+
+def video_url(i):
+	return f"https://www.youtube.com/watch?v={i:011d}"
+
+
+def entry(i, prefix="Video"):
+	return {
+		"title": f"{prefix} {i} {random.choice(('music', 'live', 'lecture', 'podcast', 'trailer'))}",
+		"display_title": f"{prefix} {i}",
+		"url": video_url(i),
+		"live": 0,
+		"channel_name": f"Channel {i % 500}",
+		"channel_url": f"https://www.youtube.com/channel/{i % 500}"
+	}
+
+
+def fill(args):
+	# Bulk load straight through the writer connection, the benchmark is about the methods not the loading
+	con = database.get_manager().writer
+	started = time.perf_counter()
+	con.executemany(
+		"insert into favorite (title, display_title, url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?)",
+		((d["title"], d["display_title"], d["url"], d["live"], d["channel_name"], d["channel_url"]) for d in map(entry, range(args.favorites)))
+	)
+	con.executemany(
+		"insert into history (title, display_title, url, canonical_url, is_live, channel_name, channel_url, last_played) values (?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now', ?))",
+		((d["title"], d["display_title"], d["url"], d["url"], d["live"], d["channel_name"], d["channel_url"], f"-{args.history - i} seconds") for i, d in enumerate(map(entry, range(args.history))))
+	)
+	con.executemany(
+		"insert into continue (url, position, audio_track) values (?, ?, -1)",
+		((video_url(i), random.random()) for i in range(0, args.history, 10))
+	)
+	collection_ids = []
+	for c in range(args.collections):
+		collection_ids.append(con.execute("insert into collections (name) values (?)", (f"Collection {c}",)).lastrowid)
+		con.executemany(
+			"insert into collection_items (collection_id, title, url, channel_name, channel_url) values (?, ?, ?, ?, ?)",
+			((collection_ids[-1], d["title"], d["url"], d["channel_name"], d["channel_url"]) for d in map(entry, range(c * args.items // 2, c * args.items // 2 + args.items)))
+		)
+	con.commit()
+	return collection_ids, time.perf_counter() - started
+
+
+def measure(results, name, function, repeat, args=lambda i: ()):
+	timings = []
+	for i in range(repeat):
+		call_args = args(i)
+		started = time.perf_counter()
+		function(*call_args)
+		timings.append((time.perf_counter() - started) * 1000)
+	timings.sort()
+	results[name] = {
+		"calls": repeat,
+		"mean_ms": sum(timings) / len(timings),
+		"p50_ms": timings[len(timings) // 2],
+		"p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+		"max_ms": timings[-1],
+	}
+	print(f"{name:<40} {results[name]['mean_ms']:10.3f} {results[name]['p50_ms']:10.3f} {results[name]['p95_ms']:10.3f} {results[name]['max_ms']:10.3f}")
+
+
+def flushed(function):
+	# Queued writes only cost something when the batch commits, so time them including the flush
+	def run(*args):
+		function(*args)
+		database.flush()
+	return run
+
+
+def run(args):
+	random.seed(args.seed)
+	# Keep retention out of the picture (it reads the settings file) unless asked for
+	database.History.retention = classmethod(lambda cls: (args.retention, 0))
+	collection_ids, fill_seconds = fill(args)
+	print(f"Filled in {fill_seconds:.1f}s: {args.favorites} favorites, {args.history} history rows, {args.collections} collections x {args.items} items")
+	print(f"{'method':<40} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+
+	repeat = args.repeat
+	heavy = max(1, repeat // 20) # full table reads
+	results = {}
+	favorite = database.Favorite()
+	history = database.History()
+	collections = database.Collections()
+	any_url = lambda n: lambda i: (video_url(random.randrange(n)) if n else video_url(i),)
+	new_url = lambda base: lambda i: (video_url(base + i),)
+
+	# Favorite
+	# Membership index: a cold load reads the whole table once, lookups after it stay in memory
+	measure(results, "membership load (favorites)", lambda: (database.membership.reset(), database.membership.is_favorite("")), heavy)
+	measure(results, "membership load (collections)", lambda: (database.membership.reset(), database.membership.collections_of("")), heavy)
+	measure(results, "Favorite.is_favorite", favorite.is_favorite, repeat, any_url(args.favorites * 2))
+	measure(results, "Favorite.get_all", favorite.get_all, heavy)
+	measure(results, "Favorite.add_favorite", flushed(favorite.add_favorite), repeat, lambda i: (entry(10**9 + i),))
+	measure(results, "Favorite.remove_favorite", flushed(favorite.remove_favorite), repeat, new_url(10**9))
+
+	# History
+	measure(results, "History.count", history.count, repeat)
+	measure(results, "History.get_history (all)", history.get_history, heavy)
+	measure(results, "History.get_history (first page)", lambda: history.get_history(200), repeat)
+	anchors = history.get_history(repeat, offset=args.history // 2) or [{"id": 0, "last_played": ""}]
+	measure(results, "History.get_history (keyset page)", lambda row: history.get_history(200, before_id=row["id"], before_played=row["last_played"]), repeat, lambda i: (anchors[i % len(anchors)],))
+	measure(results, "History.get_history (keyset by id)", lambda row: history.get_history(200, before_id=row["id"]), repeat, lambda i: (anchors[i % len(anchors)],))
+	measure(results, "History.get_history (offset page)", lambda offset: history.get_history(200, offset=offset), heavy, lambda i: (random.randrange(max(1, args.history)),))
+	rows = database.HistoryRows(history)
+	measure(results, "HistoryRows random index", lambda i: rows[i], repeat, lambda i: (random.randrange(len(rows)) if len(rows) else 0,) if len(rows) else (0,))
+	measure(results, "History.add_history (replay)", flushed(history.add_history), repeat, lambda i: (entry(random.randrange(max(1, args.history))),))
+	measure(results, "History.add_history (new)", flushed(history.add_history), repeat, lambda i: (entry(2 * 10**9 + i),))
+	measure(results, "History.remove_history", flushed(history.remove_history), repeat, new_url(2 * 10**9))
+	measure(results, "History.prune", history.prune, heavy)
+
+	# Continue
+	measure(results, "Continue.load", database.Continue.load, repeat, any_url(args.history))
+	measure(results, "Continue.get (cached)", database.Continue.get, repeat, lambda i: (video_url(0),))
+	measure(results, "Continue.upsert", flushed(database.Continue.upsert), repeat, lambda i: (video_url(3 * 10**9 + i), 0.5, -1))
+	measure(results, "Continue.set_position", database.Continue.set_position, repeat, lambda i: (video_url(3 * 10**9 + i), 0.6))
+	measure(results, "Continue.checkpoint", flushed(database.Continue.checkpoint), heavy)
+	measure(results, "Continue.remove_continue", flushed(database.Continue.remove_continue), repeat, new_url(3 * 10**9))
+	measure(results, "Continue.get_all", database.Continue.get_all, heavy)
+
+	# Collections
+	first = collection_ids[0] if collection_ids else collections.create_collection("Collection 0")
+	pick = lambda i: (random.choice(collection_ids) if collection_ids else first,)
+	measure(results, "Collections.get_all_collections", collections.get_all_collections, repeat)
+	measure(results, "Collections.get_collection_count", collections.get_collection_count, repeat, pick)
+	measure(results, "Collections.get_overview", collections.get_overview, repeat)
+	measure(results, "Collections.is_in_collection", collections.is_in_collection, repeat, lambda i: pick(i) + (video_url(random.randrange(max(1, args.items * args.collections))),))
+	measure(results, "Collections.memberships", collections.memberships, repeat, any_url(args.items * args.collections))
+	measure(results, "Collections.get_collection_items", collections.get_collection_items, heavy, pick)
+	measure(results, "Collections.create_collection", collections.create_collection, repeat, lambda i: (f"Bench {i}",))
+	bench_ids = [c["id"] for c in collections.get_all_collections() if c["name"].startswith("Bench ")]
+	measure(results, "Collections.rename_collection", collections.rename_collection, repeat, lambda i: (bench_ids[i % len(bench_ids)], f"Renamed {i}"))
+	measure(results, "Collections.add_to_collection", flushed(collections.add_to_collection), repeat, lambda i: (bench_ids[0], entry(4 * 10**9 + i)))
+	items = collections.get_collection_items(bench_ids[0]) or []
+	measure(results, "Collections.remove_from_collection", flushed(collections.remove_from_collection), min(repeat, len(items)) or 1, lambda i: (items[i]["id"] if items else 0,))
+	measure(results, "Collections.remove_by_url", flushed(collections.remove_by_url), repeat, lambda i: (bench_ids[0], video_url(4 * 10**9 + i)))
+	measure(results, "Collections.add_many", collections.add_many, heavy, lambda i: (bench_ids[1 % len(bench_ids)], map(entry, range(args.items))))
+	measure(results, "Collections.add_many (skip existing)", lambda c, it: collections.add_many(c, it, skip_existing=True), heavy, lambda i: (bench_ids[1 % len(bench_ids)], map(entry, range(args.items))))
+	measure(results, "Collections.merge_into", collections.merge_into, heavy, lambda i: (pick(i)[0], bench_ids[2 % len(bench_ids)]))
+	measure(results, "Collections.clear_collection", collections.clear_collection, heavy, lambda i: (bench_ids[(3 + i) % len(bench_ids)],))
+	measure(results, "Collections.delete_collection", collections.delete_collection, min(repeat, len(bench_ids)), lambda i: (bench_ids[i],))
+
+	# Library search
+	words = ("music", "video 12", "channel 4", "lecture", "nothing matches this")
+	measure(results, "search_library", database.search_library, repeat, lambda i: (words[i % len(words)],))
+
+	measure(results, "maintenance (light)", lambda: database.maintenance(full=False), 1)
+	measure(results, "maintenance (full)", database.maintenance, 1)
+
+	# Destructive calls last
+	measure(results, "Favorite.clear_favorites", favorite.clear_favorites, 1)
+	measure(results, "History.clear_history", history.clear_history, 1)
+	return results, fill_seconds
+
+
+def git_revision():
+	try:
+		return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+	except Exception:
+		return None
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Time every public database method against a synthetic library")
+	parser.add_argument("--favorites", type=int, default=10000)
+	parser.add_argument("--history", type=int, default=100000)
+	parser.add_argument("--collections", type=int, default=20)
+	parser.add_argument("--items", type=int, default=5000, help="items per collection")
+	parser.add_argument("--repeat", type=int, default=200, help="calls per method (full table reads use a twentieth)")
+	parser.add_argument("--retention", type=int, default=0, help="history_max_rows used by pruning, 0 keeps everything")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--output", default="db_benchmark.json")
+	args = parser.parse_args()
+
+	results, fill_seconds = run(args)
+	database.disconnect()
+	report = {
+		"revision": git_revision(),
+		"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+		"python": platform.python_version(),
+		"sqlite": sqlite3.sqlite_version,
+		"platform": platform.platform(),
+		"sizes": {"favorites": args.favorites, "history": args.history, "collections": args.collections, "items": args.items},
+		"fill_seconds": fill_seconds,
+		"results": results,
+	}
+	with open(args.output, "w", encoding="utf-8") as f:
+		json.dump(report, f, indent=4)
+	print(f"Results written to {args.output}")
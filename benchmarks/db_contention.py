@@ -0,0 +1,123 @@
+"""
+Contention benchmark for the database layer.
+
+Many reader threads run point lookups (like the resume point read when a video opens)
+while one writer thread keeps inserting and committing (like a merge or history writes).
+The managed arm times Continue.load, the uncached read Continue.get falls back to.
+The old layout, a single connection behind one RLock, is emulated inline and compared
+against the ConnectionManager used by database.py.
+
+Usage: python benchmarks/db_contention.py [readers] [seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+import sqlite3 as sql
+from threading import Thread, RLock, Event
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+import database
+
+SEED_ROWS = 5000
+WRITE_BATCH = 200
+
+
+def seed(con):
+	database.prepare_tables(con)
+	con.executemany(
+		"insert into favorite (title, display_title, url, is_live, channel_name, channel_url) values (?, ?, ?, 0, '', '')",
+		((f"title {i}", f"title {i}", f"https://youtube.com/watch?v={i}") for i in range(SEED_ROWS))
+	)
+	con.executemany(
+		"insert into continue (url, position, audio_track) values (?, ?, -1)",
+		((f"https://youtube.com/watch?v={i}", float(i)) for i in range(SEED_ROWS))
+	)
+	con.commit()
+
+
+def write_batch(con, start):
+	for i in range(start, start + WRITE_BATCH):
+		con.execute("insert into collection_items (collection_id, title, url, channel_name, channel_url) values (1, ?, ?, '', '')", (f"item {i}", f"https://youtube.com/watch?v=w{i}"))
+	con.commit()
+
+
+def percentile(values, pct):
+	values = sorted(values)
+	if not values:
+		return 0.0
+	index = min(len(values) - 1, int(len(values) * pct / 100))
+	return values[index]
+
+
+def run(name, read, write, readers, seconds):
+	stop = Event()
+	latencies = [[] for _ in range(readers)]
+
+	def reader(bucket, offset):
+		i = offset
+		while not stop.is_set():
+			url = f"https://youtube.com/watch?v={i % SEED_ROWS}"
+			started = time.perf_counter()
+			read(url)
+			bucket.append(time.perf_counter() - started)
+			i += 7
+
+	def writer():
+		n = 0
+		while not stop.is_set():
+			write(n)
+			n += WRITE_BATCH
+
+	threads = [Thread(target=reader, args=(latencies[i], i)) for i in range(readers)]
+	threads.append(Thread(target=writer))
+	for t in threads:
+		t.start()
+	time.sleep(seconds)
+	stop.set()
+	for t in threads:
+		t.join()
+	samples = [v for bucket in latencies for v in bucket]
+	print(f"{name:<10} reads={len(samples):>8} p50={percentile(samples, 50) * 1000:8.3f}ms p99={percentile(samples, 99) * 1000:8.3f}ms max={max(samples) * 1000:8.3f}ms")
+
+
+def legacy(readers, seconds):
+	path = os.path.join(tmp, "legacy.db")
+	con = sql.connect(path, check_same_thread=False)
+	seed(con)
+	lock = RLock()
+
+	def read(url):
+		with lock:
+			con.execute("select position, audio_track from continue where url=?", (url,)).fetchone()
+
+	def write(start):
+		with lock:
+			write_batch(con, start)
+
+	run("legacy", read, write, readers, seconds)
+	con.close()
+
+
+def managed(readers, seconds):
+	seed(database.get_manager().writer)
+
+	def write(start):
+		with database.manager.write_lock:
+			write_batch(database.write_con(), start)
+
+	run("wal", database.Continue.load, write, readers, seconds)
+	database.disconnect()
+
+
+if __name__ == "__main__":
+	readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+	seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+	print(f"{readers} reader threads, 1 writer thread, {seconds}s per run")
+	legacy(readers, seconds)
+	managed(readers, seconds)
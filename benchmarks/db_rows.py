@@ -0,0 +1,118 @@
+"""
+Memory and fetch time of the database readers for a large library.
+
+Compares the compact Row records returned by Favorite.get_all, History.get_history and
+Collections.get_collection_items with the dict per row the readers used to build,
+and shows what streaming with the iter_* readers costs when the caller does not keep the rows.
+Runs headless: only sqlite3 and the database module are needed.
+
+Usage: python benchmarks/db_rows.py [--rows N] [--repeat N]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+import database
+
+
+def fill(rows):
+	con = database.get_manager().writer
+	video = lambda i: (f"Video {i}", f"Video {i}. Channel {i % 500}", f"https://www.youtube.com/watch?v={i:011d}", 0, f"Channel {i % 500}", f"https://www.youtube.com/channel/{i % 500}")
+	con.executemany("insert into favorite (title, display_title, url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?)", map(video, range(rows)))
+	con.executemany(
+		"insert into history (title, display_title, url, canonical_url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?, ?)",
+		((t, d, u, u, l, n, c) for t, d, u, l, n, c in map(video, range(rows)))
+	)
+	collection_id = con.execute("insert into collections (name) values ('Benchmark')").lastrowid
+	con.executemany(
+		"insert into collection_items (collection_id, title, url, channel_name, channel_url) values (?, ?, ?, ?, ?)",
+		((collection_id, t, u, n, c) for t, d, u, l, n, c in map(video, range(rows)))
+	)
+	con.commit()
+	return collection_id
+
+
+# The readers as they were: one dict per row
+def dict_favorites():
+	con = database.read_con()
+	cursor = con.execute("select title, display_title, url, is_live, channel_name, channel_url from favorite").fetchall()
+	return [{"title": t, "display_title": d, "url": u, "live": l, "channel_name": n, "channel_url": c} for t, d, u, l, n, c in cursor]
+
+
+def dict_history():
+	con = database.read_con()
+	cursor = con.execute("select id, title, display_title, url, is_live, channel_name, channel_url, play_count, last_played from history order by last_played desc, id desc").fetchall()
+	return [{"id": i, "title": t, "display_title": d, "url": u, "live": l, "channel_name": n, "channel_url": c, "play_count": p, "last_played": lp} for i, t, d, u, l, n, c, p, lp in cursor]
+
+
+def dict_items(collection_id):
+	con = database.read_con()
+	cursor = con.execute("select id, title, url, channel_name, channel_url from collection_items where collection_id=?", (collection_id,)).fetchall()
+	return [{"id": i, "title": t, "url": u, "channel_name": n, "channel_url": c, "display_title": t} for i, t, u, n, c in cursor]
+
+
+def retained(function):
+	# Bytes still allocated while the result is alive, and the peak while building it
+	gc.collect()
+	tracemalloc.start()
+	result = function()
+	size, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del result
+	return size, peak
+
+
+def streamed(function):
+	# Peak while walking the rows without keeping them
+	gc.collect()
+	tracemalloc.start()
+	for row in function():
+		row["url"]
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return peak
+
+
+def timed(function, repeat):
+	timings = []
+	for i in range(repeat):
+		started = time.perf_counter()
+		function()
+		timings.append((time.perf_counter() - started) * 1000)
+	timings.sort()
+	return timings[len(timings) // 2]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare row records with dicts per row")
+	parser.add_argument("--rows", type=int, default=100000)
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+
+	collection_id = fill(args.rows)
+	favorite = database.Favorite()
+	history = database.History()
+	collections = database.Collections()
+	readers = (
+		("favorites", dict_favorites, favorite.get_all, favorite.iter_all),
+		("history", dict_history, history.get_history, history.iter_history),
+		("collection items", lambda: dict_items(collection_id), lambda: collections.get_collection_items(collection_id), lambda: collections.iter_items(collection_id)),
+	)
+	print(f"{args.rows} rows per table")
+	print(f"{'reader':<18} {'kind':<8} {'kept MB':>10} {'peak MB':>10} {'p50 ms':>10}")
+	for name, old, new, stream in readers:
+		for kind, function in (("dict", old), ("row", new)):
+			size, peak = retained(function)
+			print(f"{name:<18} {kind:<8} {size / 2**20:10.2f} {peak / 2**20:10.2f} {timed(function, args.repeat):10.1f}")
+		print(f"{name:<18} {'stream':<8} {0:10.2f} {streamed(stream) / 2**20:10.2f} {timed(lambda: sum(1 for row in stream()), args.repeat):10.1f}")
+	database.disconnect()
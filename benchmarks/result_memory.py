@@ -0,0 +1,117 @@
+"""
+Memory held by the entries of a large playlist and of a long search session.
+
+Compares the dict per entry (with a nested channel dict) that PlaylistResult and Search used to keep
+with the ResultSet they share now, for the same synthetic flat yt-dlp entries.
+Display titles are left out on both sides, they are the same strings either way.
+Needs no wx display and no network.
+
+Usage: python benchmarks/result_memory.py [--entries N] [--channels N]
+"""
+import argparse
+import gc
+import gettext
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+gettext.NullTranslations().install()
+# search_handler only takes time_formatting from utiles, which would pull in wx and the settings.
+# No display title is built here, so it is never called
+utiles = types.ModuleType("utiles")
+utiles.time_formatting = str
+sys.modules["utiles"] = utiles
+from youtube_browser.search_handler import Search, ResultSet, Result
+
+
+def flat_entries(count, channels):
+	# Every string is built separately, like json decoding a response would
+	return [{
+		"_type": "url", "ie_key": "Youtube", "id": f"{i:011d}", "url": f"https://www.youtube.com/watch?v={i:011d}",
+		"title": f"Video number {i} of the benchmark playlist", "duration": 60 + i % 3600, "view_count": i * 1000,
+		"uploader": "".join(("Channel ", str(i % channels))), "uploader_url": "".join(("https://www.youtube.com/@channel", str(i % channels)))
+	} for i in range(count)]
+
+
+# What PlaylistResult.parse and Search.parse_entries kept before
+def playlist_dicts(entries):
+	videos = []
+	for vid in entries:
+		videos.append({
+			"title": vid.get("title"),
+			"url": vid.get("url"),
+			"duration": str(vid.get("duration")),
+			"channel": {"name": vid.get("uploader"), "url": vid.get("uploader_url")},
+		})
+	return videos
+
+
+def search_dicts(entries):
+	results = {}
+	for i, result in enumerate(entries, 1):
+		results[i] = {
+			"type": "video", "title": result.get("title"), "url": result.get("url"), "duration": result.get("duration"),
+			"duration_formatted": str(result.get("duration")), "elements": 0,
+			"channel": {"name": result.get("uploader"), "url": result.get("uploader_url")},
+			"views": "{:,}".format(result.get("view_count"))
+		}
+	return results
+
+
+def playlist_set(entries):
+	videos = ResultSet()
+	for vid in entries:
+		videos.append(Result(("video", vid.get("title"), vid.get("url"), vid.get("duration"), None, 0, vid.get("uploader"), vid.get("uploader_url"))), None)
+	return videos
+
+
+def search_set(entries):
+	search = Search.__new__(Search)
+	search.filter = 0
+	search.results = ResultSet()
+	for result in entries:
+		search.results.append(search.parse_entry(result), None)
+	return search.results
+
+
+def retained(function):
+	# Bytes still held once the entries yt-dlp returned are gone, as after a parse; build time separately
+	gc.collect()
+	tracemalloc.start()
+	entries = flat_entries(args.entries, args.channels)
+	started = time.perf_counter()
+	result = function(entries)
+	elapsed = (time.perf_counter() - started) * 1000
+	del entries
+	gc.collect()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del result
+	return size, elapsed
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare dict entries with ResultSet")
+	parser.add_argument("--entries", type=int, default=10000)
+	parser.add_argument("--channels", type=int, default=200, help="distinct channels among the entries")
+	args = parser.parse_args()
+
+	print(f"{args.entries} entries from {args.channels} channels")
+	print(f"{'store':<22} {'kept MB':>10} {'bytes/entry':>12} {'build ms':>10}")
+	for name, function in (
+		("playlist dicts", playlist_dicts),
+		("playlist ResultSet", playlist_set),
+		("search dicts", search_dicts),
+		("search ResultSet", search_set),
+	):
+		size, elapsed = retained(function)
+		print(f"{name:<22} {size / 2**20:10.2f} {size / args.entries:12.0f} {elapsed:10.1f}")
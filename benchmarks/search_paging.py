@@ -0,0 +1,105 @@
+"""
+Time of each "load more" page of a search as the result list grows.
+
+The old paging re-ran ytsearch<limit>: from the first result on every page and parsed every entry again,
+Search.load_more now takes the next page from the generator the search was started with.
+By default the search is simulated: entries come in continuations of --continuation results,
+each costing --latency ms like a request to YouTube would. With --query both run against YouTube.
+Needs yt-dlp installed, no wx display.
+
+Usage: python benchmarks/search_paging.py [--pages N] [--latency MS] [--continuation N] [--query TEXT]
+"""
+import argparse
+import gettext
+import os
+import sys
+import tempfile
+import time
+import types
+from itertools import islice
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+gettext.NullTranslations().install()
+# search_handler only takes time_formatting from utiles, which would pull in wx and the settings.
+# Durations are shown as plain seconds here, the same for both sides of the comparison
+utiles = types.ModuleType("utiles")
+utiles.time_formatting = str
+sys.modules["utiles"] = utiles
+from extraction_handler import pool
+from youtube_browser.search_handler import Search, ResultSet
+
+
+def simulated_results(latency, continuation):
+	# What the search extractor yields: flat url entries, one request per continuation
+	i = 0
+	while True:
+		if i % continuation == 0:
+			time.sleep(latency / 1000)
+		yield {
+			"_type": "url", "ie_key": "Youtube", "id": f"{i:011d}", "url": f"https://www.youtube.com/watch?v={i:011d}",
+			"title": f"Result {i}", "duration": 60 + i % 3600, "view_count": i * 1000,
+			"uploader": f"Channel {i % 50}", "uploader_url": f"https://www.youtube.com/channel/{i % 50}"
+		}
+		i += 1
+
+
+class SimulatedSearch(Search):
+	def start(self):
+		self.exhausted = False
+		self.entries = simulated_results(args.latency, args.continuation)
+
+
+def old_page(search, limit, fetch):
+	# What load_more did: the whole list up to the new limit, parsed from the start
+	search.results.clear()
+	search.new_videos = 0
+	for result in fetch(limit):
+		entry = search.parse_entry(result)
+		if entry is None: continue
+		search.results.append(entry, search.display_title(entry))
+		search.new_videos += 1
+
+
+def simulated_fetch(limit):
+	return list(islice(simulated_results(args.latency, args.continuation), limit))
+
+
+def live_fetch(limit):
+	with pool.borrow("flat search", cookies=True) as ydl:
+		info = ydl.extract_info(f"ytsearch{limit}:{args.query}", download=False)
+	return info.get("entries") or []
+
+
+def timed(function):
+	started = time.perf_counter()
+	function()
+	return (time.perf_counter() - started) * 1000
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare re-running the search with incremental paging")
+	parser.add_argument("--pages", type=int, default=10)
+	parser.add_argument("--latency", type=float, default=150, help="simulated ms per continuation request")
+	parser.add_argument("--continuation", type=int, default=20, help="simulated results per continuation")
+	parser.add_argument("--query", help="search YouTube for this instead of simulating")
+	args = parser.parse_args()
+
+	fetch = live_fetch if args.query else simulated_fetch
+	new = Search(args.query) if args.query else SimulatedSearch("simulated")
+	old = SimulatedSearch.__new__(SimulatedSearch)
+	old.filter = 0
+	old.results = ResultSet()
+	old_page(old, Search.page_size, fetch)
+	print(f"{'page':>6} {'results':>8} {'re-run ms':>12} {'incremental ms':>16}")
+	for page in range(2, args.pages + 1):
+		limit = page * Search.page_size
+		old_ms = timed(lambda: old_page(old, limit, fetch))
+		new_ms = timed(new.load_more)
+		print(f"{page:>6} {limit:>8} {old_ms:12.1f} {new_ms:16.1f}")
+	new.close()
+	pool.close()
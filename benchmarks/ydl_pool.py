@@ -0,0 +1,87 @@
+"""
+Per-call overhead of building a YoutubeDL instance versus borrowing one from extraction_handler.pool.
+
+Every call sets up the YouTube extractor and reads the cookie jar, which is what a real extraction
+pays before it touches the network. With --url the same comparison runs real extract_info calls.
+Needs yt-dlp installed, no wx display.
+
+Usage: python benchmarks/ydl_pool.py [--calls N] [--cookies N] [--url URL]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_bench_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path
+os.makedirs(settings_path, exist_ok=True)
+import yt_dlp
+import extraction_handler
+
+
+def write_cookies(count):
+	# A synthetic Netscape cookie file, real exports from a browser hold a few hundred entries
+	with open(os.path.join(settings_path, "cookies.txt"), "w", encoding="utf-8") as f:
+		f.write("# Netscape HTTP Cookie File\n")
+		for i in range(count):
+			f.write(f".youtube.com\tTRUE\t/\tTRUE\t2147483647\tcookie{i}\tvalue{i}\n")
+
+
+def fresh(profile, cookies, work):
+	opts = dict(extraction_handler.PROFILES[profile])
+	if cookies:
+		opts.update(extraction_handler.cookie_opts())
+	with yt_dlp.YoutubeDL(opts) as ydl:
+		work(ydl)
+
+
+def pooled(profile, cookies, work):
+	with extraction_handler.pool.borrow(profile, cookies) as ydl:
+		work(ydl)
+
+
+def setup_only(ydl):
+	ydl.get_info_extractor("Youtube")
+	ydl.cookiejar
+
+
+def timed(function, calls):
+	timings = []
+	for i in range(calls):
+		started = time.perf_counter()
+		function()
+		timings.append((time.perf_counter() - started) * 1000)
+	timings.sort()
+	return sum(timings) / len(timings), timings[len(timings) // 2], timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare fresh YoutubeDL instances with the pool")
+	parser.add_argument("--calls", type=int, default=200)
+	parser.add_argument("--cookies", type=int, default=300, help="entries in the synthetic cookies.txt, 0 for none")
+	parser.add_argument("--url", help="also time real extractions of this url")
+	args = parser.parse_args()
+
+	if args.cookies:
+		write_cookies(args.cookies)
+	print(f"yt-dlp {yt_dlp.version.__version__}, {args.calls} calls, {args.cookies} cookies")
+	print(f"{'case':<44} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+	cases = []
+	for profile in extraction_handler.PROFILES:
+		for cookies in ((False, True) if args.cookies else (False,)):
+			name = f"{profile}{' + cookies' if cookies else ''}"
+			cases.append((f"{name} (fresh)", lambda p=profile, c=cookies: fresh(p, c, setup_only), args.calls))
+			cases.append((f"{name} (pooled)", lambda p=profile, c=cookies: pooled(p, c, setup_only), args.calls))
+	if args.url:
+		extract = lambda ydl: ydl.extract_info(args.url, download=False)
+		calls = max(1, args.calls // 20)
+		cases.append(("video stream extraction (fresh)", lambda: fresh("video stream", False, extract), calls))
+		cases.append(("video stream extraction (pooled)", lambda: pooled("video stream", False, extract), calls))
+	for name, function, calls in cases:
+		mean, p50, p95 = timed(function, calls)
+		print(f"{name:<44} {mean:10.3f} {p50:10.3f} {p95:10.3f}")
+	extraction_handler.pool.close()
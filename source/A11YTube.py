@@ -222,6 +222,12 @@ class HomeScreen(wx.Frame):
 			from utiles import check_for_updates
 			Thread(target=check_for_updates, args=[True]).start()
 
+		# Database upkeep, at most once a day and only while the user is away
+		self.maintaining = False
+		self.maintenanceTimer = wx.Timer(self)
+		self.Bind(wx.EVT_TIMER, self.onMaintenanceTimer, self.maintenanceTimer)
+		self.maintenanceTimer.Start(60 * 1000)
+
 	def onNavChange(self, event):
 		sel = self.navBox.GetSelection()
 		self.updateContent(sel)
@@ -441,8 +447,27 @@ class HomeScreen(wx.Frame):
 {_('Developed By')}: {application.author}.
 {_('Description: ')}{_(application.description)}."""
 		wx.MessageBox(about, _("About"), parent=self)
+	def onMaintenanceTimer(self, event):
+		if self.maintaining: return
+		try:
+			last = float(settings_handler.config_get("last_maintenance"))
+		except (TypeError, ValueError):
+			last = 0
+		if time.time() - last < 24 * 60 * 60: return
+		from utiles import idle_seconds
+		if idle_seconds() < 5 * 60: return
+		self.maintaining = True
+		Thread(target=self.runMaintenance, daemon=True).start()
+
+	def runMaintenance(self):
+		try:
+			if database.maintenance() is not None:
+				settings_handler.config_set("last_maintenance", int(time.time()))
+		finally:
+			self.maintaining = False
+
 	def onClose(self, event):
-		database.disconnect()
+		database.shutdown()
 		wx.Exit()
 
 if __name__ == "__main__":
@@ -481,6 +506,12 @@ if __name__ == "__main__":
 		Thread(target=preload_modules, args=[splash]).start()
 		
 		app.MainLoop()
+		# Windows other than the home screen leave through wx.Exit without closing the database
+		database.shutdown()
+		from extraction_handler import pool, coordinator
+		# Queued extractions are dropped, running ones finish on their own
+		coordinator.executor.shutdown(wait=False, cancel_futures=True)
+		pool.close()
 	except Exception as e:
 		import traceback
 		with open("crash.log", "w") as f:
@@ -5,8 +5,11 @@ from paths import settings_path
 
 def backup_data(zip_path):
 	"""
-	Zips the contents of settings_path to zip_path, excluding the 'updates' directory.
+	Zips the contents of settings_path to zip_path, excluding the 'updates' directory and the metadata cache.
 	"""
+	# The database runs in WAL mode, fold pending pages into the main file first
+	import database
+	database.checkpoint()
 	with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
 		for root, dirs, files in os.walk(settings_path):
 			# Exclude 'updates' directory
@@ -14,6 +17,9 @@ def backup_data(zip_path):
 				dirs.remove('updates')
 			
 			for file in files:
+				# The metadata cache is rebuilt on demand, no point in carrying it around
+				if file.startswith("cache.db"):
+					continue
 				file_path = os.path.join(root, file)
 				# Calculate relative path for the zip archive
 				rel_path = os.path.relpath(file_path, settings_path)
@@ -25,6 +31,9 @@ def restore_data(zip_path):
 	Restores data from zip_path to settings_path, overwriting existing files.
 	"""
 	try:
+		# Close the database so its WAL file cannot be replayed over the restored copy
+		import database
+		database.disconnect()
 		with zipfile.ZipFile(zip_path, 'r') as zipf:
 			zipf.extractall(settings_path)
 		return True
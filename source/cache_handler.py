@@ -0,0 +1,182 @@
+import json
+import re
+import sqlite3 as sql
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from paths import cache_path
+from database import VIDEO_ID_PATTERN
+
+
+METADATA_TTL = 7 * 24 * 60 * 60 # title, description, tags and the like rarely change
+STREAM_TTL = 3 * 60 * 60 # for stream urls that do not say when they expire
+EXPIRY_MARGIN = 5 * 60 # stop handing out a signed url this long before it expires
+# googlevideo urls carry expire=<unix time>, HLS and DASH manifests /expire/<unix time>/
+EXPIRE_PATTERN = re.compile(r"[?&/]expire[=/](\d+)")
+
+# yt-dlp info keys worth keeping, so a cached entry can stand in for the info dict
+METADATA_KEYS = (
+	"id", "title", "description", "tags", "duration", "view_count", "upload_date",
+	"uploader", "uploader_url", "channel", "channel_url", "artist", "creator",
+	"related_videos", "recommendations", "suggested_videos"
+)
+RELATED_KEYS = ("id", "url", "title", "uploader", "uploader_url", "channel", "channel_url", "duration")
+
+
+def trim_metadata(info):
+	# The stable part of an info dict, without formats or signed urls
+	data = {}
+	for key in METADATA_KEYS:
+		value = info.get(key)
+		if value is None:
+			continue
+		if key in ("related_videos", "recommendations", "suggested_videos"):
+			value = [{k: v.get(k) for k in RELATED_KEYS if v.get(k) is not None} for v in value if isinstance(v, dict)]
+		data[key] = value
+	return data
+
+
+def url_expiry(*urls):
+	# Earliest expiry among the signed urls, None when none of them carries one
+	times = []
+	for url in urls:
+		match = EXPIRE_PATTERN.search(url or "")
+		if match:
+			times.append(int(match.group(1)))
+	return min(times) if times else None
+
+
+def stream_ttl(*urls):
+	# How long resolved stream urls can be reused, expired ones give zero or less
+	expiry = url_expiry(*urls)
+	if expiry is None:
+		return STREAM_TTL
+	return expiry - EXPIRY_MARGIN - time.time()
+
+
+def video_key(url):
+	# Every link form of a video shares one entry, other urls are cached as they are
+	match = VIDEO_ID_PATTERN.search(url or "")
+	return match.group(1) if match else url
+
+
+class InfoCache:
+	"""
+	On disk cache of extraction results under settings_path, one row per (video, kind).
+	Kinds are "metadata" for the stable part of the info dict and stream kinds such as "audio" or "video"
+	for signed urls; every row carries its own expiry time and expired rows read as missing.
+	"""
+	def __init__(self, path):
+		self.lock = Lock()
+		self.con = sql.connect(path, check_same_thread=False, timeout=10)
+		self.con.execute("PRAGMA journal_mode=WAL")
+		self.con.execute("PRAGMA synchronous=NORMAL")
+		self.con.execute("create table if not exists info (video text not null, kind text not null, data text not null, expires real not null, primary key (video, kind))")
+		self.purge()
+
+	def get(self, url, kind):
+		with self.lock:
+			row = self.con.execute("select data from info where video=? and kind=? and expires>?", (video_key(url), kind, time.time())).fetchone()
+		if row is None:
+			return None
+		try:
+			return json.loads(row[0])
+		except ValueError:
+			return None
+
+	def put(self, url, kind, data, ttl):
+		with self.lock:
+			self.con.execute("insert or replace into info (video, kind, data, expires) values (?, ?, ?, ?)", (video_key(url), kind, json.dumps(data), time.time() + ttl))
+			self.con.commit()
+
+	def discard(self, url, kind=None):
+		with self.lock:
+			if kind is None:
+				self.con.execute("delete from info where video=?", (video_key(url),))
+			else:
+				self.con.execute("delete from info where video=? and kind=?", (video_key(url), kind))
+			self.con.commit()
+
+	def purge(self):
+		with self.lock:
+			self.con.execute("delete from info where expires<=?", (time.time(),))
+			self.con.commit()
+
+	def clear(self):
+		with self.lock:
+			self.con.execute("delete from info")
+			self.con.commit()
+
+	def get_metadata(self, url):
+		return self.get(url, "metadata")
+
+	def put_metadata(self, info):
+		# Merged into what is already known, extractions with different options fill in different keys
+		if not info:
+			return
+		url = info.get("webpage_url") or info.get("original_url") or info.get("id")
+		if not url:
+			return
+		data = self.get_metadata(url) or {}
+		data.update(trim_metadata(info))
+		self.put(url, "metadata", data, METADATA_TTL)
+
+
+class StreamCache:
+	"""
+	In memory Stream objects keyed by video and mode ("audio" or "video"),
+	each reused until shortly before its signed urls expire. Going back to a track
+	or replaying a video then starts without an extraction or even a disk read.
+	"""
+	max_entries = 200
+
+	def __init__(self):
+		self.lock = Lock()
+		self.entries = OrderedDict() # (video, kind) -> (stream, expires)
+
+	def get(self, url, kind):
+		key = (video_key(url), kind)
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is None:
+				return None
+			if time.time() >= entry[1]:
+				del self.entries[key]
+				return None
+			self.entries.move_to_end(key)
+			return entry[0]
+
+	def put(self, url, kind, stream):
+		ttl = stream_ttl(stream.url, stream.audio_url)
+		if ttl <= 0:
+			return
+		with self.lock:
+			self.entries[(video_key(url), kind)] = (stream, time.time() + ttl)
+			self.entries.move_to_end((video_key(url), kind))
+			while len(self.entries) > self.max_entries:
+				self.entries.popitem(last=False)
+
+	def discard(self, url, kind=None):
+		with self.lock:
+			for key in [key for key in self.entries if key[0] == video_key(url) and kind in (None, key[1])]:
+				del self.entries[key]
+
+
+stream_cache = StreamCache()
+
+cache = None
+cache_lock = Lock()
+
+def get_cache():
+	# Opened on first use; None when the cache file cannot be opened (extraction then simply goes to the network)
+	global cache
+	if cache is None:
+		with cache_lock:
+			if cache is None:
+				try:
+					cache = InfoCache(cache_path)
+				except sql.Error as e:
+					print(f"Metadata cache unavailable: {e}")
+					return None
+	return cache
@@ -0,0 +1,135 @@
+import json
+import os
+import re
+
+
+decoder = json.JSONDecoder()
+WHITESPACE = " \t\r\n"
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z") # What may still follow a number cut at the end of a chunk
+
+
+class CollectionReader:
+	"""
+	Incremental reader for exported collection files ({"name": ..., "items": [...]}).
+	The file is read in chunks and every item is decoded on its own,
+	so importing a very large collection never holds the whole file in memory.
+	"""
+	def __init__(self, path, chunk_size=64 * 1024, progress=None):
+		self.path = path
+		self.chunk_size = chunk_size
+		self.progress = progress # called with (bytes read, file size)
+		self.size = os.path.getsize(path)
+		self.read_bytes = 0
+		self.file = None
+		self.buffer = ""
+		self.pos = 0
+		self.eof = False
+
+	def fill(self):
+		# Drop what was already consumed and append the next chunk
+		chunk = self.file.read(self.chunk_size)
+		if not chunk:
+			self.eof = True
+			return False
+		self.buffer = self.buffer[self.pos:] + chunk
+		self.pos = 0
+		self.read_bytes = self.file.tell()
+		if self.progress:
+			self.progress(self.read_bytes, self.size)
+		return True
+
+	def skip_whitespace(self):
+		while True:
+			while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+				self.pos += 1
+			if self.pos < len(self.buffer) or not self.fill():
+				return
+
+	def peek(self):
+		self.skip_whitespace()
+		if self.pos >= len(self.buffer):
+			raise ValueError("Unexpected end of collection file")
+		return self.buffer[self.pos]
+
+	def expect(self, char):
+		if self.peek() != char:
+			raise ValueError(f"Invalid collection file: expected '{char}' at offset {self.read_bytes - len(self.buffer) + self.pos}")
+		self.pos += 1
+
+	def value(self):
+		# Decode one JSON value, reading more of the file while it is incomplete
+		self.skip_whitespace()
+		while True:
+			try:
+				value, end = decoder.raw_decode(self.buffer, self.pos)
+			except json.JSONDecodeError:
+				if self.fill():
+					continue
+				raise
+			# A number may continue in the next chunk, also when the chunk ends right after its "." or "e"
+			if value.__class__ in (int, float) and NUMBER_TAIL.match(self.buffer, end) and not self.eof and self.fill():
+				continue
+			self.pos = end
+			return value
+
+	def events(self):
+		"""
+		Yields ("name", value) and the other top level keys as they appear,
+		and ("item", value) for every entry of the items array.
+		"""
+		with open(self.path, "r", encoding="utf-8") as self.file:
+			self.fill()
+			self.expect("{")
+			if self.peek() == "}":
+				return
+			while True:
+				key = self.value()
+				self.expect(":")
+				if key == "items":
+					self.expect("[")
+					if self.peek() == "]":
+						self.pos += 1
+					else:
+						while True:
+							yield "item", self.value()
+							if self.peek() == ",":
+								self.pos += 1
+								continue
+							self.expect("]")
+							break
+				else:
+					yield key, self.value()
+				if self.peek() == ",":
+					self.pos += 1
+					continue
+				self.expect("}")
+				return
+
+
+def read_collection_name(path):
+	# Exports write the name first, so this normally stops after the first few bytes
+	for key, value in CollectionReader(path).events():
+		if key == "name":
+			return value
+	return None
+
+
+def iter_collection_items(path, progress=None):
+	for key, value in CollectionReader(path, progress=progress).events():
+		if key == "item" and isinstance(value, dict):
+			yield value
+
+
+def write_collection(path, name, items):
+	"""
+	Counterpart of CollectionReader: writes {"name": ..., "items": [...]} one item at a time,
+	so a collection can be streamed from the database to disk. Returns the number of items written.
+	"""
+	count = 0
+	with open(path, "w", encoding="utf-8") as f:
+		f.write('{\n    "name": ' + json.dumps(name, ensure_ascii=False) + ',\n    "items": [')
+		for item in items:
+			f.write(("," if count else "") + "\n        " + json.dumps(dict(item), ensure_ascii=False))
+			count += 1
+		f.write("\n    ]\n}\n" if count else "]\n}\n")
+	return count
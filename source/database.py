@@ -1,169 +1,944 @@
 import sqlite3 as sql
 from paths import db_path
 import os
+import re
+import time
+from collections import deque, OrderedDict
+from collections.abc import Sequence
+from itertools import islice
+from threading import RLock, Lock, Condition, Thread, local, current_thread
+
+
+class ConnectionManager:
+	"""
+	Opens the database in WAL mode and gives every thread its own read connection,
+	while all writes are funnelled through a single writer connection.
+	Readers never take the write lock, so a long merge or history write
+	does not block a favorite check running on another thread.
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.write_lock = RLock()
+		self.readers_lock = Lock()
+		self.readers = {} # thread ident -> (thread, connection)
+		self.idle = [] # read connections left behind by finished threads
+		self.writer = self.open()
+		# Only takes effect on a new file, older databases are switched over by maintenance()
+		self.writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+		self.writer.execute("PRAGMA journal_mode=WAL")
+		self.queue = WriteQueue(self)
+
+	def open(self):
+		con = sql.connect(self.path, check_same_thread=False, timeout=10)
+		# WAL is safe with NORMAL sync and it saves an fsync per commit
+		con.execute("PRAGMA synchronous=NORMAL")
+		return con
+
+	def reader(self):
+		thread = current_thread()
+		entry = self.readers.get(thread.ident)
+		if entry is not None and entry[0] is thread:
+			return entry[1]
+		with self.readers_lock:
+			# Recycle connections of threads that are gone (the browser spawns many short lived threads)
+			for ident, (owner, con) in list(self.readers.items()):
+				if not owner.is_alive():
+					del self.readers[ident]
+					self.idle.append(con)
+			con = self.idle.pop() if self.idle else self.open()
+			self.readers[thread.ident] = (thread, con)
+		return con
+
+	def close(self):
+		self.queue.stop()
+		with self.write_lock, self.readers_lock:
+			for owner, con in self.readers.values():
+				con.close()
+			for con in self.idle:
+				con.close()
+			self.readers.clear()
+			self.idle.clear()
+			self.writer.close()
+
+
+class WriteQueue:
+	"""
+	Group commit for the small, fire and forget writes (history, resume positions, favorites).
+	Mutations are queued and a background thread applies them on the writer connection,
+	committing everything that arrived within a short window in a single transaction.
+	A thread that reads after queuing a write flushes first, so it always sees its own writes.
+	"""
+	def __init__(self, manager, window=0.05, max_batch=100):
+		self.manager = manager
+		self.window = window
+		self.max_batch = max_batch
+		self.pending = deque()
+		self.condition = Condition(Lock())
+		self.local = local()
+		self.sequence = 0 # last queued write
+		self.committed = 0 # last committed write
+		self.stopped = False
+		self.thread = None
+
+	def submit(self, function, args, kwargs):
+		with self.condition:
+			if self.stopped:
+				return
+			self.sequence += 1
+			self.local.sequence = self.sequence
+			self.pending.append((function, args, kwargs, self.sequence))
+			if self.thread is None:
+				self.thread = Thread(target=self.run, daemon=True)
+				self.thread.start()
+			self.condition.notify()
+
+	def run(self):
+		while True:
+			with self.condition:
+				while not self.pending and not self.stopped:
+					self.condition.wait()
+				# Leave the batch open for a moment so back to back writes share one commit
+				deadline = time.monotonic() + self.window
+				while not self.stopped and len(self.pending) < self.max_batch:
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						break
+					self.condition.wait(remaining)
+				if self.stopped:
+					return
+			with self.manager.write_lock:
+				self.drain()
+
+	def drain(self):
+		# Must be called with the write lock held
+		while True:
+			with self.condition:
+				if not self.pending:
+					return
+				batch = self.pending
+				self.pending = deque()
+			con = self.manager.writer
+			for function, args, kwargs, sequence in batch:
+				try:
+					function(*args, **kwargs)
+				except Exception as e:
+					print(e)
+			try:
+				con.commit()
+			except Exception as e:
+				print(e)
+				con.rollback()
+			self.committed = sequence
+
+	def sync(self):
+		# Read your own writes: only flush when this thread still has something in flight
+		if getattr(self.local, "sequence", 0) > self.committed:
+			self.flush()
+
+	def flush(self):
+		with self.manager.write_lock:
+			self.drain()
+
+	def stop(self):
+		with self.condition:
+			self.stopped = True
+			self.condition.notify()
+		if self.thread is not None and self.thread is not current_thread():
+			self.thread.join()
+		self.flush()
+
 
 def db_init():
 	try:
-		con = sql.connect(db_path, check_same_thread=False)
+		manager = ConnectionManager(db_path)
 	except Exception as e:
 		print(e)
-		con = None
-	return con
+		manager = None
+	return manager
+
 
+init_lock = RLock()
 
-def get_con():
-	global con
-	if con is None:
-		con = db_init()
-		if con is not None:
-			prepare_tables()
-	return con
+def get_manager():
+	global manager
+	if manager is None:
+		with init_lock:
+			if manager is None:
+				new_manager = db_init()
+				if new_manager is not None:
+					prepare_tables(new_manager.writer)
+				manager = new_manager
+	return manager
 
-from threading import RLock
+def read_con():
+	return manager.reader()
 
-db_lock = RLock()
+def write_con():
+	return manager.writer
 
 def is_valid(function):
+	# Read access: runs on the calling thread's own connection without locking
+	def rapper(*args, **kwargs):
+		if get_manager() is not None:
+			manager.queue.sync()
+			return function(*args, **kwargs)
+	return rapper
+
+def is_writer(function):
+	# Write access: serialized on the single writer connection, after any queued writes
 	def rapper(*args, **kwargs):
-		with db_lock:
-			if get_con() is not None:
+		if get_manager() is not None:
+			with manager.write_lock:
+				manager.queue.drain()
 				return function(*args, **kwargs)
 	return rapper
 
+def is_queued(function):
+	# Deferred write: applied and committed by the write queue, the function must not commit itself
+	def rapper(*args, **kwargs):
+		if get_manager() is not None:
+			manager.queue.submit(function, args, kwargs)
+	return rapper
 
-con = None
 
+manager = None
 
-@is_valid
-def prepare_tables():
-	favorites_query = """create table if not exists favorite (id integer primary key, title text not null, display_title text not null, url text not null, is_live integer not null, channel_name text not null, channel_url not null)"""
-	con.execute(favorites_query)
-	con.commit()
-	continue_query = "create table if not exists continue (id integer primary key, url text not null, position real not null)"
-	con.execute(continue_query)
-	con.commit()
-	history_query = """create table if not exists history (id integer primary key, title text not null, display_title text not null, url text not null, is_live integer not null, channel_name text not null, channel_url not null, timestamp datetime default current_timestamp)"""
-	con.execute(history_query)
-	con.commit()
-	
-	col_query = "create table if not exists collections (id integer primary key, name text not null unique)"
-	con.execute(col_query)
-	con.commit()
-	
-	col_items_query = "create table if not exists collection_items (id integer primary key, collection_id integer not null, title text not null, url text not null, channel_name text, channel_url text, foreign key(collection_id) references collections(id) on delete cascade)"
-	con.execute(col_items_query)
-	con.commit()
-	
-	# Migration for audio_track
-	try:
-		con.execute("ALTER TABLE continue ADD COLUMN audio_track INTEGER DEFAULT -1")
-		con.commit()
-	except Exception:
-		pass # Column likely exists
+VIDEO_ID_PATTERN = re.compile(r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w\-]{11})")
+
+def canonical_url(url):
+	# The same video reaches us as youtu.be, shorts or watch links with extra parameters
+	match = VIDEO_ID_PATTERN.search(url or "")
+	if match:
+		return f"https://www.youtube.com/watch?v={match.group(1)}"
+	return url
+
+def prune_history(con, max_rows, max_days):
+	# 0 disables a limit
+	if max_days > 0:
+		con.execute("delete from history where last_played < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)", (f"-{max_days} days",))
+	if max_rows > 0:
+		con.execute("delete from history where id in (select id from history order by last_played desc, id desc limit -1 offset ?)", (max_rows,))
+
+
+history_query = """create table if not exists history (id integer primary key, title text not null, display_title text not null, url text not null, canonical_url text not null, is_live integer not null, channel_name text not null, channel_url not null, timestamp datetime default current_timestamp, play_count integer not null default 1, last_played text not null default (strftime('%Y-%m-%d %H:%M:%f', 'now')))"""
 
-	# Indexes for performance
+
+def migration_1(con):
+	# Base schema (also adopts databases created before versioning, hence the existence checks)
+	con.execute("""create table if not exists favorite (id integer primary key, title text not null, display_title text not null, url text not null, is_live integer not null, channel_name text not null, channel_url not null)""")
+	con.execute("create table if not exists continue (id integer primary key, url text not null, position real not null)")
+	con.execute("""create table if not exists history (id integer primary key, title text not null, display_title text not null, url text not null, is_live integer not null, channel_name text not null, channel_url not null, timestamp datetime default current_timestamp)""")
+	con.execute("create table if not exists collections (id integer primary key, name text not null unique)")
+	con.execute("create table if not exists collection_items (id integer primary key, collection_id integer not null, title text not null, url text not null, channel_name text, channel_url text, foreign key(collection_id) references collections(id) on delete cascade)")
+	if "audio_track" not in table_columns(con, "continue"):
+		con.execute("ALTER TABLE continue ADD COLUMN audio_track INTEGER DEFAULT -1")
 	con.execute("CREATE INDEX IF NOT EXISTS idx_fav_url ON favorite(url)")
-	con.execute("CREATE INDEX IF NOT EXISTS idx_hist_url ON history(url)")
 	con.execute("CREATE INDEX IF NOT EXISTS idx_col_items_url ON collection_items(url)")
-	con.commit()
+
+def migration_2(con):
+	# History v2, one row per video with play counts
+	if "canonical_url" not in table_columns(con, "history"):
+		migrate_history(con)
+	con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_hist_canonical ON history(canonical_url)")
+	con.execute("CREATE INDEX IF NOT EXISTS idx_hist_recent ON history(last_played)")
+
+def migration_3(con):
+	# A single resume point per url (older versions could store duplicates)
+	con.execute("delete from continue where id not in (select max(id) from continue group by url)")
+	con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_continue_url ON continue(url)")
+
+def migration_4(con):
+	# Merges and duplicate checks look items up by collection and url
+	con.execute("CREATE INDEX IF NOT EXISTS idx_col_items_collection_url ON collection_items(collection_id, url)")
+
+def migration_5(con):
+	prepare_search(con)
+
+def migration_6(con):
+	# Last modified time of a collection, kept current by triggers on the collection and its items
+	if "modified_at" not in table_columns(con, "collections"):
+		con.execute("alter table collections add column modified_at text")
+	now = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+	con.execute(f"update collections set modified_at=coalesce(modified_at, {now})")
+	con.execute(f"create trigger if not exists collections_created after insert on collections begin update collections set modified_at={now} where id=new.id; end")
+	con.execute(f"create trigger if not exists collections_renamed after update of name on collections begin update collections set modified_at={now} where id=new.id; end")
+	con.execute(f"create trigger if not exists collection_items_added after insert on collection_items begin update collections set modified_at={now} where id=new.collection_id; end")
+	con.execute(f"create trigger if not exists collection_items_removed after delete on collection_items begin update collections set modified_at={now} where id=old.collection_id; end")
+
+# Numbered schema changes, PRAGMA user_version holds how many of them the database has.
+# Only ever append to this list.
+migrations = [migration_1, migration_2, migration_3, migration_4, migration_5, migration_6]
+
+def table_columns(con, table):
+	return [row[1] for row in con.execute(f"pragma table_info({table})")]
+
+def prepare_tables(con):
+	global fts_available
+	version = con.execute("pragma user_version").fetchone()[0]
+	if version < len(migrations):
+		# All pending migrations run in one transaction, a failure leaves the database untouched
+		con.execute("begin immediate")
+		try:
+			for number, migration in enumerate(migrations[version:], version + 1):
+				migration(con)
+				con.execute(f"pragma user_version = {number}")
+			con.commit()
+		except Exception:
+			con.rollback()
+			raise
+	fts_available = con.execute("select 1 from sqlite_master where type='table' and name='favorite_fts'").fetchone() is not None
+
+# Full text index of the library: table -> indexed columns
+fts_tables = {
+	"favorite": ("title", "display_title", "channel_name"),
+	"history": ("title", "display_title", "channel_name"),
+	"collection_items": ("title", "channel_name"),
+}
+fts_available = True
+
+def prepare_search(con):
+	# External content FTS5 tables kept in sync by triggers, built from the existing rows
+	for table, columns in fts_tables.items():
+		fts = f"{table}_fts"
+		names = ", ".join(columns)
+		new_values = ", ".join(f"new.{column}" for column in columns)
+		old_values = ", ".join(f"old.{column}" for column in columns)
+		if con.execute("select 1 from sqlite_master where type='table' and name=?", (fts,)).fetchone():
+			continue
+		try:
+			con.execute(f"create virtual table {fts} using fts5({names}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+		except sql.OperationalError as e:
+			# sqlite built without FTS5, search falls back to LIKE
+			print(e)
+			return
+		con.execute(f"create trigger if not exists {table}_fts_insert after insert on {table} begin insert into {fts}(rowid, {names}) values (new.id, {new_values}); end")
+		con.execute(f"create trigger if not exists {table}_fts_delete after delete on {table} begin insert into {fts}({fts}, rowid, {names}) values ('delete', old.id, {old_values}); end")
+		con.execute(f"create trigger if not exists {table}_fts_update after update of {names} on {table} begin insert into {fts}({fts}, rowid, {names}) values ('delete', old.id, {old_values}); insert into {fts}(rowid, {names}) values (new.id, {new_values}); end")
+		con.execute(f"insert into {fts}({fts}) values ('rebuild')")
+
+def migrate_history(con):
+	# Rebuild the history table: keep the newest row of every video and count the duplicates as plays
+	con.create_function("canonical_url", 1, canonical_url)
+	con.execute("alter table history rename to history_old")
+	con.execute(history_query)
+	con.execute("""insert into history (id, title, display_title, url, canonical_url, is_live, channel_name, channel_url, timestamp, play_count, last_played)
+		select h.id, h.title, h.display_title, h.url, plays.canonical, h.is_live, h.channel_name, h.channel_url, h.timestamp, plays.total, coalesce(strftime('%Y-%m-%d %H:%M:%f', h.timestamp), strftime('%Y-%m-%d %H:%M:%f', 'now'))
+		from history_old h join (select canonical_url(url) as canonical, max(id) as last_id, count(*) as total from history_old group by canonical) plays on plays.last_id=h.id""")
+	con.execute("drop table history_old")
+
+def checkpoint():
+	# Fold the WAL file back into the main database file (used before backups)
+	if get_manager() is not None:
+		with manager.write_lock:
+			manager.writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def database_bytes(con):
+	return con.execute("PRAGMA page_count").fetchone()[0] * con.execute("PRAGMA page_size").fetchone()[0]
+
+def maintenance(full=True):
+	"""
+	Keeps the database file compact and the query planner informed: refreshes the statistics
+	(ANALYZE on the first run, PRAGMA optimize after it), gives free pages back to the file system
+	and folds the WAL back in. A full pass also switches old databases to incremental vacuum
+	(one VACUUM) and runs a quick integrity check; the light pass is cheap enough to run on exit.
+	Returns a report with the database size, reclaimed bytes, integrity messages and duration.
+	"""
+	if get_manager() is None:
+		return None
+	started = time.perf_counter()
+	integrity = None
+	with manager.write_lock:
+		manager.queue.drain()
+		con = manager.writer
+		try:
+			before = database_bytes(con)
+			con.execute("PRAGMA analysis_limit=400")
+			if con.execute("select 1 from sqlite_master where name='sqlite_stat1'").fetchone() is None:
+				con.execute("ANALYZE")
+			else:
+				con.execute("PRAGMA optimize")
+			if full and con.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+				con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+				con.execute("VACUUM")
+			else:
+				con.commit()
+				# executescript steps the pragma to the end, execute would only free a single page
+				con.executescript("PRAGMA incremental_vacuum")
+			con.commit()
+			if full:
+				integrity = [row[0] for row in con.execute("PRAGMA quick_check").fetchall()]
+			con.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+			after = database_bytes(con)
+		except sql.Error as e:
+			print(f"Database maintenance failed: {e}")
+			return None
+	report = {
+		"size": after,
+		"reclaimed": max(0, before - after),
+		"integrity": integrity,
+		"seconds": time.perf_counter() - started
+	}
+	if integrity is not None and integrity != ["ok"]:
+		print(f"Database integrity check: {'; '.join(integrity)}")
+	print(f"Database maintenance: reclaimed {report['reclaimed']} bytes, {after} bytes in {report['seconds']:.2f}s")
+	return report
+
+def fts_query(text):
+	# Every word of the user's text becomes a quoted prefix term, so punctuation cannot break the syntax
+	words = text.split()
+	return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
 
 @is_valid
+def search_library(query, limit=50):
+	"""
+	Searches titles and channel names across favorites, history and collections.
+	Returns dicts shaped like the other rows plus "source" (favorite, history or collection)
+	and "collection" (the collection name for collection items).
+	"""
+	con = read_con()
+	if not query.strip():
+		return []
+	try:
+		return library_rows(con, query, limit)
+	except sql.OperationalError as e:
+		print(e)
+		return []
+
+def library_rows(con, query, limit):
+	if fts_available:
+		match = fts_query(query)
+		cursor = con.execute("""select * from (
+			select 'favorite', f.title, f.display_title, f.url, f.is_live, f.channel_name, f.channel_url, null, bm25(favorite_fts) as rank
+				from favorite_fts join favorite f on f.id=favorite_fts.rowid where favorite_fts match ?
+			union all
+			select 'history', h.title, h.display_title, h.url, h.is_live, h.channel_name, h.channel_url, null, bm25(history_fts) as rank
+				from history_fts join history h on h.id=history_fts.rowid where history_fts match ?
+			union all
+			select 'collection', c.title, c.title, c.url, 0, c.channel_name, c.channel_url, col.name, bm25(collection_items_fts) as rank
+				from collection_items_fts join collection_items c on c.id=collection_items_fts.rowid join collections col on col.id=c.collection_id where collection_items_fts match ?
+		) order by rank limit ?""", (match, match, match, limit))
+	else:
+		pattern = f"%{query.strip()}%"
+		cursor = con.execute("""select * from (
+			select 'favorite', title, display_title, url, is_live, channel_name, channel_url, null from favorite where title like ?1 or channel_name like ?1
+			union all
+			select 'history', title, display_title, url, is_live, channel_name, channel_url, null from history where title like ?1 or channel_name like ?1
+			union all
+			select 'collection', c.title, c.title, c.url, 0, c.channel_name, c.channel_url, col.name from collection_items c join collections col on col.id=c.collection_id where c.title like ?1 or c.channel_name like ?1
+		) limit ?2""", (pattern, limit))
+	data = []
+	for row in cursor.fetchall():
+		source, title, display_title, url, live, channel_name, channel_url, collection = row[:8]
+		data.append({
+			"source": source,
+			"title": title,
+			"display_title": display_title,
+			"url": url,
+			"live": live,
+			"channel_name": channel_name or "",
+			"channel_url": channel_url or "",
+			"collection": collection
+		})
+	return data
+
+def flush():
+	# Commit every queued write now (used when closing the player and the app)
+	if manager is not None:
+		manager.queue.flush()
+
 def disconnect():
-	con.close()
+	global manager
+	with init_lock:
+		if manager is not None:
+			manager.close()
+			manager = None
+	# A restored backup brings its own favorites and collections
+	membership.reset()
+
+def shutdown():
+	# On exit: a light maintenance pass if the database was opened at all, then close it
+	if manager is not None:
+		maintenance(full=False)
+	disconnect()
+
+class Row(tuple):
+	"""
+	Compact read only record for one result row: a plain tuple of the selected columns, with no per row dict.
+	Columns are read by name like a dict (row["url"], row.get("url"), dict(row)) or as attributes (row.url).
+	Subclasses list their columns in fields, and aliases maps extra names onto one of them.
+	"""
+	__slots__ = ()
+	fields = ()
+	aliases = {}
+	positions = {}
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		cls.positions = {name: i for i, name in enumerate(cls.fields)}
+		for alias, name in cls.aliases.items():
+			cls.positions[alias] = cls.positions[name]
+
+	def __getitem__(self, key):
+		if key.__class__ is str:
+			try:
+				return tuple.__getitem__(self, self.positions[key])
+			except KeyError:
+				raise KeyError(key) from None
+		return tuple.__getitem__(self, key)
+
+	def __getattr__(self, name):
+		try:
+			return tuple.__getitem__(self, self.positions[name])
+		except KeyError:
+			raise AttributeError(name) from None
+
+	def __contains__(self, key):
+		return key in self.positions
+
+	def get(self, key, default=None):
+		position = self.positions.get(key)
+		return default if position is None else tuple.__getitem__(self, position)
+
+	def keys(self):
+		return list(self.positions)
+
+	def items(self):
+		return [(name, tuple.__getitem__(self, position)) for name, position in self.positions.items()]
+
+	def __repr__(self):
+		return f"{type(self).__name__}({dict(self.items())})"
+
+class FavoriteRow(Row):
+	__slots__ = ()
+	fields = ("title", "display_title", "url", "live", "channel_name", "channel_url")
+
+class HistoryRow(Row):
+	__slots__ = ()
+	fields = ("id", "title", "display_title", "url", "live", "channel_name", "channel_url", "play_count", "last_played")
+
+class CollectionItem(Row):
+	__slots__ = ()
+	fields = ("id", "title", "url", "channel_name", "channel_url")
+	aliases = {"display_title": "title"} # Helper for UI consistency
+
+class MembershipIndex:
+	"""
+	Process wide view of which urls are favorites and which collections hold them.
+	Both maps are loaded once on first use and then kept current by the database layer,
+	so checking a url never touches sqlite. Listeners are called with (kind, url) after every change,
+	kind being "favorite" or "collection" (url is None when many urls changed at once).
+	"""
+	def __init__(self):
+		self.lock = RLock()
+		self.favorites = None
+		self.collections = None
+		self.version = 0 # bumped by every change, a load that raced one is not kept
+		self.listeners = []
+
+	def reset(self):
+		with self.lock:
+			self.favorites = None
+			self.collections = None
+			self.version += 1
+		self.notify("favorite", None)
+		self.notify("collection", None)
 
-class Favorite:
 	@is_valid
+	def load_favorites(self):
+		con = read_con()
+		return {row[0] for row in con.execute("select url from favorite")}
+
+	@is_valid
+	def load_collections(self):
+		con = read_con()
+		data = {}
+		for collection_id, url in con.execute("select collection_id, url from collection_items"):
+			data.setdefault(url, set()).add(collection_id)
+		return data
+
+	def loaded(self, name, load):
+		# The load runs without self.lock: it syncs the write queue, which takes the write lock,
+		# and writers update the index while holding the write lock
+		with self.lock:
+			data = getattr(self, name)
+			version = self.version
+		if data is not None:
+			return data
+		data = load()
+		if data is None:
+			return None
+		with self.lock:
+			if getattr(self, name) is None and self.version == version:
+				setattr(self, name, data)
+		return data
+
+	def is_favorite(self, url):
+		favorites = self.loaded("favorites", self.load_favorites)
+		with self.lock:
+			return favorites is not None and url in favorites
+
+	def collections_of(self, url):
+		collections = self.loaded("collections", self.load_collections)
+		if collections is None:
+			return set()
+		with self.lock:
+			return set(collections.get(url, ()))
+
+	def subscribe(self, callback):
+		with self.lock:
+			if callback not in self.listeners:
+				self.listeners.append(callback)
+
+	def unsubscribe(self, callback):
+		with self.lock:
+			if callback in self.listeners:
+				self.listeners.remove(callback)
+
+	def notify(self, kind, url):
+		with self.lock:
+			listeners = list(self.listeners)
+		for callback in listeners:
+			try:
+				callback(kind, url)
+			except Exception as e:
+				print(f"Membership listener failed: {e}")
+
+	def favorite_added(self, url):
+		with self.lock:
+			self.version += 1
+			if self.favorites is not None:
+				self.favorites.add(url)
+		self.notify("favorite", url)
+
+	def favorite_removed(self, url):
+		with self.lock:
+			self.version += 1
+			if self.favorites is not None:
+				self.favorites.discard(url)
+		self.notify("favorite", url)
+
+	def favorites_cleared(self):
+		with self.lock:
+			self.version += 1
+			self.favorites = set()
+		self.notify("favorite", None)
+
+	def item_added(self, collection_id, url):
+		with self.lock:
+			self.version += 1
+			if self.collections is not None:
+				self.collections.setdefault(url, set()).add(collection_id)
+		self.notify("collection", url)
+
+	def item_removed(self, collection_id, url):
+		with self.lock:
+			self.version += 1
+			if self.collections is not None and url in self.collections:
+				self.collections[url].discard(collection_id)
+				if not self.collections[url]:
+					del self.collections[url]
+		self.notify("collection", url)
+
+	def collections_changed(self):
+		# Bulk changes just drop the map, it is rebuilt on the next lookup
+		with self.lock:
+			self.version += 1
+			self.collections = None
+		self.notify("collection", None)
+
+membership = MembershipIndex()
+
+class Favorite:
 	def add_favorite(self, data):
+		self.insert_favorite(data)
+		membership.favorite_added(data['url'])
+
+	def remove_favorite(self, url):
+		self.delete_favorite(url)
+		membership.favorite_removed(url)
+
+	@is_queued
+	def insert_favorite(self, data):
+		con = write_con()
 		query = "insert into favorite (title, display_title, url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?)"
 		# Sanitize inputs to prevent NOT NULL constraint failures
 		c_name = data.get('channel_name') or ""
 		c_url = data.get('channel_url') or ""
 		con.execute(query, (data['title'], data['display_title'], data['url'], data['live'], c_name, c_url))
-		con.commit()
 
-	@is_valid
-	def remove_favorite(self, url):
+	@is_queued
+	def delete_favorite(self, url):
+		con = write_con()
 		con.execute('delete from favorite where url=?', (url,))
-		con.commit()
-	@is_valid
+
 	def is_favorite(self, url):
-		cursor = con.execute('select id from favorite where url=?', (url,)).fetchone()
-		return cursor is not None
+		return membership.is_favorite(url)
 
 	@is_valid
 	def get_all(self):
+		con = read_con()
 		cursor = con.execute("select title, display_title, url, is_live, channel_name, channel_url from favorite").fetchall()
-		data = []
-		for title, display_title, url, live, channel_name, channel_url in cursor:
-			row = {
-				"title": title,
-				"display_title": display_title,
-				"url": url,
-				"live": live,
-				"channel_name": channel_name,
-				"channel_url": channel_url
-			}
-			data.append(row)
-		return data
+		return list(map(FavoriteRow, cursor))
 
 	@is_valid
+	def iter_all(self):
+		# Same rows as get_all, read from the cursor as they are consumed
+		con = read_con()
+		return map(FavoriteRow, con.execute("select title, display_title, url, is_live, channel_name, channel_url from favorite"))
+
+	@is_writer
 	def clear_favorites(self):
+		con = write_con()
 		con.execute("delete from favorite")
 		con.commit()
+		membership.favorites_cleared()
 
 class History:
-	@is_valid
+	prune_every = 50 # history writes between two retention passes
+	writes = 0
+
+	@is_queued
 	def add_history(self, data):
-		# check if url exists to move it to top (optional, or just duplicate? Let's avoid duplicates for now or just simple insert)
-		# User didn't specify, but typical history moves recent to top. 
-		# For simplicity and speed, we delete old entry if exists then insert new.
-		self.remove_history(data['url'])
-		
-		query = "insert into history (title, display_title, url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?)"
+		con = write_con()
+		# One row per video: replaying it bumps the play count and moves it back to the top
+		query = """insert into history (title, display_title, url, canonical_url, is_live, channel_name, channel_url) values (?, ?, ?, ?, ?, ?, ?)
+			on conflict(canonical_url) do update set title=excluded.title, display_title=excluded.display_title, url=excluded.url, is_live=excluded.is_live, channel_name=excluded.channel_name, channel_url=excluded.channel_url, play_count=play_count+1, last_played=excluded.last_played"""
 		# Sanitize inputs
 		c_name = data.get('channel_name') or ""
 		c_url = data.get('channel_url') or ""
-		con.execute(query, (data['title'], data['display_title'], data['url'], data['live'], c_name, c_url))
-		con.commit()
+		con.execute(query, (data['title'], data['display_title'], data['url'], canonical_url(data['url']), data['live'], c_name, c_url))
+		# Prune on the first write of the session and then every few writes, inside the same batch
+		if History.writes % self.prune_every == 0:
+			prune_history(con, *self.retention())
+		History.writes += 1
 
-	@is_valid
+	@is_queued
 	def remove_history(self, url):
-		con.execute('delete from history where url=?', (url,))
+		con = write_con()
+		con.execute('delete from history where canonical_url=?', (canonical_url(url),))
+
+	@is_writer
+	def prune(self):
+		con = write_con()
+		prune_history(con, *self.retention())
 		con.commit()
 
-	@is_valid
+	@classmethod
+	def retention(self):
+		# Retention policy from the settings: (max rows, max days)
+		from settings_handler import config_get
+		try:
+			return int(config_get("history_max_rows")), int(config_get("history_max_days"))
+		except (TypeError, ValueError):
+			return 0, 0
+
+	@is_writer
 	def clear_history(self):
+		con = write_con()
 		con.execute("delete from history")
 		con.commit()
 
+	@staticmethod
+	def select(limit=None, before_id=None, offset=0, before_played=None):
+		# Most recently played first. Pages continue after the last row seen (keyset),
+		# offset is only used to jump straight into the middle of the list.
+		query = "select id, title, display_title, url, is_live, channel_name, channel_url, play_count, last_played from history"
+		params = []
+		if before_id is not None:
+			if before_played is not None:
+				query += " where (last_played, id) < (?, ?)"
+				params.extend((before_played, before_id))
+			else:
+				query += " where (last_played, id) < (select last_played, id from history where id=?)"
+				params.append(before_id)
+		query += " order by last_played desc, id desc"
+		if limit is not None:
+			query += " limit ? offset ?"
+			params.extend((limit, offset))
+		return query, params
+
 	@is_valid
-	def get_history(self):
-		# Order by ID desc (newest first)
-		cursor = con.execute("select title, display_title, url, is_live, channel_name, channel_url from history order by id desc").fetchall()
-		data = []
-		for title, display_title, url, live, channel_name, channel_url in cursor:
-			row = {
-				"title": title,
-				"display_title": display_title,
-				"url": url,
-				"live": live,
-				"channel_name": channel_name,
-				"channel_url": channel_url
-			}
-			data.append(row)
-		return data
+	def get_history(self, limit=None, before_id=None, offset=0, before_played=None):
+		con = read_con()
+		cursor = con.execute(*self.select(limit, before_id, offset, before_played)).fetchall()
+		return list(map(HistoryRow, cursor))
+
+	@is_valid
+	def iter_history(self, before_id=None, before_played=None):
+		# Streams the history newest first without building the whole list
+		con = read_con()
+		return map(HistoryRow, con.execute(*self.select(None, before_id, 0, before_played)))
+
+	@is_valid
+	def count(self):
+		con = read_con()
+		return con.execute("select count(*) from history").fetchone()[0]
+
+
+class HistoryRows(Sequence):
+	"""
+	Read only, page cached view of the watch history (newest first).
+	Rows are fetched one page at a time when an index is first touched, so the history
+	window and the player can index into it like a list without loading the whole table.
+	"""
+	page_size = 200
+	max_pages = 50
+
+	def __init__(self, history=None):
+		self.history = history or History()
+		self.lock = Lock()
+		self.pages = OrderedDict()
+		self.length = self.history.count() or 0
+
+	def __len__(self):
+		return self.length
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self.length))]
+		if index < 0:
+			index += self.length
+		if not 0 <= index < self.length:
+			raise IndexError(index)
+		page, offset = divmod(index, self.page_size)
+		rows = self.load(page)
+		if offset >= len(rows):
+			raise IndexError(index)
+		return rows[offset]
+
+	def load(self, page):
+		with self.lock:
+			rows = self.pages.get(page)
+			if rows is not None:
+				self.pages.move_to_end(page)
+				return rows
+			previous = self.pages.get(page - 1)
+			if previous:
+				last = previous[-1]
+				rows = self.history.get_history(self.page_size, before_id=last["id"], before_played=last["last_played"])
+			else:
+				rows = self.history.get_history(self.page_size, offset=page * self.page_size)
+			rows = rows or []
+			self.pages[page] = rows
+			if len(self.pages) > self.max_pages:
+				self.pages.popitem(last=False)
+			return rows
+
+	def discard(self, index):
+		# Forget a removed row: pages from that point on shift by one and get fetched again
+		with self.lock:
+			first = index // self.page_size
+			for page in [page for page in self.pages if page >= first]:
+				del self.pages[page]
+			self.length = max(0, self.length - 1)
 
 
 class Continue:
+	# Write-through cache of resume points, url -> {"position", "audio_track"} (None when there is none),
+	# least recently used first. Positions reported while playing only touch the cache and are written out by checkpoint().
+	max_entries = 500
+	cache = OrderedDict()
+	dirty = set()
+	previous = {} # url -> the row a checkpoint overwrote (None when there was none), put back when the player moves on
+	cache_lock = Lock()
+
+	@classmethod
+	def get(self, url):
+		with self.cache_lock:
+			if url in self.cache:
+				self.cache.move_to_end(url)
+				data = self.cache[url]
+				return dict(data) if data else None
+		data = self.load(url)
+		with self.cache_lock:
+			# A write may have landed while we were reading, it wins
+			data = self.cache.setdefault(url, data)
+			self.trim()
+		return dict(data) if data else None
+
+	@classmethod
+	def trim(self):
+		# Called with cache_lock held. Positions not written out yet stay until the next checkpoint
+		excess = len(self.cache) - self.max_entries
+		if excess > 0:
+			for url in [url for url in self.cache if url not in self.dirty][:excess]:
+				del self.cache[url]
+
 	@classmethod
 	@is_valid
-	def new_continue(self, url, position, audio_track=-1):
-		query = "insert into continue (url, position, audio_track) values (?, ?, ?)"
+	def load(self, url):
+		con = read_con()
+		row = con.execute("select position, audio_track from continue where url=?", (url,)).fetchone()
+		if row is None:
+			return None
+		return {"position": row[0], "audio_track": row[1]}
+
+	@classmethod
+	def upsert(self, url, position, audio_track=-1):
+		with self.cache_lock:
+			self.cache[url] = {"position": position, "audio_track": audio_track}
+			self.cache.move_to_end(url)
+			self.dirty.discard(url)
+			self.previous.pop(url, None)
+			self.trim()
+		self.save(url, position, audio_track)
+
+	@classmethod
+	def set_position(self, url, position):
+		# Cheap enough for every timer tick, nothing reaches the disk until the next checkpoint
+		with self.cache_lock:
+			data = self.cache.get(url)
+			audio_track = data["audio_track"] if data else -1
+			self.cache[url] = {"position": position, "audio_track": audio_track}
+			self.cache.move_to_end(url)
+			self.dirty.add(url)
+			self.trim()
+
+	@classmethod
+	def discard(self, url):
+		# The player moved on to another video: its position is dropped and what a checkpoint overwrote,
+		# a point saved in an earlier session or nothing, is put back
+		with self.cache_lock:
+			written = url in self.previous
+			if written:
+				row = self.previous.pop(url)
+				self.cache[url] = row
+			elif url in self.dirty:
+				self.cache.pop(url, None)
+			self.dirty.discard(url)
+		if not written:
+			return
+		if row is None:
+			self.delete(url)
+		else:
+			self.save(url, row["position"], row["audio_track"])
+
+	@classmethod
+	def checkpoint(self):
+		with self.cache_lock:
+			pending = [(url, self.cache[url]) for url in self.dirty]
+			self.dirty.clear()
+			first = [url for url, data in pending if url not in self.previous]
+		# Before the first write of a url, remember the row it replaces
+		for url in first:
+			row = self.load(url)
+			with self.cache_lock:
+				self.previous.setdefault(url, row)
+		for url, data in pending:
+			self.save(url, data["position"], data["audio_track"])
+
+	@classmethod
+	@is_queued
+	def save(self, url, position, audio_track):
+		con = write_con()
+		query = """insert into continue (url, position, audio_track) values (?, ?, ?)
+			on conflict(url) do update set position=excluded.position, audio_track=excluded.audio_track"""
 		con.execute(query, (url, position, audio_track))
-		con.commit()
+
 	@classmethod
 	@is_valid
 	def get_all(self):
+		con = read_con()
 		# Now returns full dict with position and track
 		try:
 			cursor = con.execute("select url, position, audio_track from continue").fetchall()
@@ -181,24 +956,26 @@ class Continue:
 		return data
 
 	@classmethod
-	@is_valid
-	def update(self, url, position, audio_track=-1):
-		query = "update continue set position=?, audio_track=? where url=?"
-		con.execute(query, (position, audio_track, url))
-		con.commit()
+	def remove_continue(self, url):
+		with self.cache_lock:
+			self.cache[url] = None
+			self.dirty.discard(url)
+			self.previous.pop(url, None)
+		self.delete(url)
 
 	@classmethod
-	@is_valid
-	def remove_continue(self, url):
+	@is_queued
+	def delete(self, url):
+		con = write_con()
 		con.execute('delete from continue where url=?', (url,))
-		con.commit()
-
-
 
 
 class Collections:
-	@is_valid
+	batch_size = 1000 # Items add_many inserts per transaction
+
+	@is_writer
 	def create_collection(self, name):
+		con = write_con()
 		try:
 			cursor = con.execute("insert into collections (name) values (?)", (name,))
 			con.commit()
@@ -206,8 +983,9 @@ class Collections:
 		except sql.IntegrityError:
 			return False
 
-	@is_valid
+	@is_writer
 	def rename_collection(self, collection_id, new_name):
+		con = write_con()
 		try:
 			con.execute("update collections set name=? where id=?", (new_name, collection_id))
 			con.commit()
@@ -215,15 +993,18 @@ class Collections:
 		except sql.IntegrityError:
 			return False
 
-	@is_valid
+	@is_writer
 	def delete_collection(self, collection_id):
+		con = write_con()
 		con.execute("delete from collections where id=?", (collection_id,))
 		# Cascade delete might not work by default in all sqlite versions without enabling PRAGMA
 		con.execute("delete from collection_items where collection_id=?", (collection_id,))
 		con.commit()
+		membership.collections_changed()
 
 	@is_valid
 	def get_all_collections(self):
+		con = read_con()
 		cursor = con.execute("select id, name from collections order by name").fetchall()
 		data = []
 		for id, name in cursor:
@@ -231,44 +1012,128 @@ class Collections:
 		return data
 
 	@is_valid
+	def get_overview(self):
+		# Every collection with its item count and last change, in a single query
+		con = read_con()
+		cursor = con.execute("""select c.id, c.name, count(i.id), c.modified_at from collections c
+			left join collection_items i on i.collection_id=c.id group by c.id order by c.name""").fetchall()
+		data = []
+		for id, name, count, modified_at in cursor:
+			data.append({"id": id, "name": name, "count": count, "modified_at": modified_at})
+		return data
+
 	def add_to_collection(self, collection_id, data):
+		self.insert_item(collection_id, data)
+		membership.item_added(collection_id, data['url'])
+
+	@is_queued
+	def insert_item(self, collection_id, data):
+		con = write_con()
 		query = "insert into collection_items (collection_id, title, url, channel_name, channel_url) values (?, ?, ?, ?, ?)"
 		c_name = data.get('channel_name') or ""
 		c_url = data.get('channel_url') or ""
 		con.execute(query, (collection_id, data['title'], data['url'], c_name, c_url))
+
+	def add_many(self, collection_id, items, skip_existing=False):
+		# Bulk insert, items can be any iterable (consumed lazily). It is read batch_size items at a time
+		# without the write lock and every batch is inserted in its own transaction, so reading a large
+		# import file never holds up the other writes (player checkpoints, history) for long.
+		# With skip_existing, urls already in the collection (or repeated in items) are left out.
+		items = iter(items)
+		count = 0
+		try:
+			while True:
+				batch = [(collection_id, data['title'], data['url'], data.get('channel_name') or "", data.get('channel_url') or "") for data in islice(items, self.batch_size)]
+				if not batch:
+					return count
+				count += self.insert_items(batch, skip_existing) or 0
+		finally:
+			if count:
+				membership.collections_changed()
+
+	@is_writer
+	def insert_items(self, rows, skip_existing):
+		con = write_con()
+		try:
+			if not skip_existing:
+				query = "insert into collection_items (collection_id, title, url, channel_name, channel_url) values (?, ?, ?, ?, ?)"
+				con.executemany(query, rows)
+				count = len(rows)
+			else:
+				# Earlier batches are committed already, so the exists check also skips urls they added
+				con.execute("create temp table if not exists staged_items (collection_id integer, title text, url text, channel_name text, channel_url text)")
+				con.execute("delete from staged_items")
+				con.executemany("insert into staged_items values (?, ?, ?, ?, ?)", rows)
+				count = con.execute("""insert into collection_items (collection_id, title, url, channel_name, channel_url)
+					select s.collection_id, s.title, s.url, s.channel_name, s.channel_url from staged_items s
+					where s.rowid in (select min(rowid) from staged_items group by url)
+					and not exists (select 1 from collection_items c where c.collection_id=s.collection_id and c.url=s.url)
+					order by s.rowid""").rowcount
+				con.execute("delete from staged_items")
+			con.commit()
+		except Exception:
+			con.rollback()
+			raise
+		return count
+
+	@is_writer
+	def merge_into(self, source_id, target_id):
+		# Copy the items of one collection into another in a single statement, skipping urls the target has
+		con = write_con()
+		cursor = con.execute("""insert into collection_items (collection_id, title, url, channel_name, channel_url)
+			select ?, s.title, s.url, s.channel_name, s.channel_url from collection_items s
+			where s.collection_id=? and not exists (select 1 from collection_items t where t.collection_id=? and t.url=s.url)
+			order by s.id""", (target_id, source_id, target_id))
 		con.commit()
+		membership.collections_changed()
+		return cursor.rowcount
 
-	@is_valid
 	def remove_from_collection(self, item_id):
+		self.delete_item(item_id)
+		membership.collections_changed()
+
+	@is_queued
+	def delete_item(self, item_id):
+		con = write_con()
 		con.execute("delete from collection_items where id=?", (item_id,))
-		con.commit()
 
 	@is_valid
 	def get_collection_items(self, collection_id):
+		con = read_con()
 		cursor = con.execute("select id, title, url, channel_name, channel_url from collection_items where collection_id=?", (collection_id,)).fetchall()
-		data = []
-		for id, title, url, c_name, c_url in cursor:
-			data.append({
-				"id": id,
-				"title": title,
-				"url": url,
-				"channel_name": c_name,
-				"channel_url": c_url,
-				"display_title": title # Helper for UI consistency
-			})
-		return data
+		return list(map(CollectionItem, cursor))
 
 	@is_valid
+	def iter_items(self, collection_id):
+		# Streams the items of a collection, for exports and other single pass readers
+		con = read_con()
+		return map(CollectionItem, con.execute("select id, title, url, channel_name, channel_url from collection_items where collection_id=? order by id", (collection_id,)))
+
+	@is_writer
 	def clear_collection(self, collection_id):
+		con = write_con()
 		con.execute("delete from collection_items where collection_id=?", (collection_id,))
 		con.commit()
+		membership.collections_changed()
+
+	def memberships(self, url):
+		# Ids of every collection holding this url
+		return membership.collections_of(url)
+
+	def remove_by_url(self, collection_id, url):
+		self.delete_by_url(collection_id, url)
+		membership.item_removed(collection_id, url)
+
+	@is_queued
+	def delete_by_url(self, collection_id, url):
+		con = write_con()
+		con.execute("delete from collection_items where collection_id=? and url=?", (collection_id, url))
 
-	@is_valid
 	def is_in_collection(self, collection_id, url):
-		res = con.execute("select id from collection_items where collection_id=? and url=?", (collection_id, url)).fetchone()
-		return res is not None
+		return collection_id in membership.collections_of(url)
 
 	@is_valid
 	def get_collection_count(self, collection_id):
+		con = read_con()
 		cursor = con.execute("select count(*) from collection_items where collection_id=?", (collection_id,)).fetchone()
 		return cursor[0] if cursor else 0
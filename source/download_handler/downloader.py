@@ -84,17 +84,10 @@ class Downloader:
 	def get_title(self):
 		if not self.folder:
 			return None
-		import yt_dlp as youtube_dl
+		from extraction_handler import pool
 		try:
-			ydl_opts = {
-				'quiet': True,
-				'extract_flat': 'in_playlist', # fast extraction
-				'ignoreerrors': True,
-			}
-			from utiles import get_cookie_opts, get_ffmpeg_path
-			ydl_opts.update(get_cookie_opts())
-			ydl_opts['ffmpeg_location'] = get_ffmpeg_path()
-			with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+			# fast extraction, ffmpeg plays no part in reading a title
+			with pool.borrow("flat search", cookies=True) as ydl:
 				info = ydl.extract_info(self.url, download=False)
 				return info.get('title')
 		except Exception:
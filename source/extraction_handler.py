@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+
+from paths import settings_path
+
+
+# Options shared by every call of one kind. Only options yt-dlp reads while extracting
+# (playlistend and the like) can be changed per call, anything it prepares up front
+# (format, cookiefile, extract_flat) has to be part of the profile.
+PROFILES = {
+	"flat search": {
+		'extract_flat': 'in_playlist',
+		'quiet': True,
+		'ignoreerrors': True,
+	},
+	"flat playlist": {
+		'extract_flat': True,
+		'quiet': True,
+		'ignoreerrors': True,
+		'no_warnings': True,
+	},
+	"video stream": {
+		# Prioritize 720p (22) and 360p (18) progressive mp4 for compatibility, the audio stream is picked from the same formats
+		'format': '22/18/best[ext=mp4]/best',
+		'quiet': True,
+		'no_warnings': True,
+		'noplaylist': True,
+	},
+}
+
+
+def cookie_opts():
+	path = os.path.join(settings_path, "cookies.txt")
+	if os.path.exists(path):
+		return {'cookiefile': path}
+
+	if os.path.exists("cookies.txt"):
+		return {'cookiefile': "cookies.txt"}
+	return {}
+
+
+def cookie_signature():
+	# Which cookies file is in use and when it last changed
+	path = cookie_opts().get('cookiefile')
+	if not path:
+		return None
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None
+	return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def close_instance(ydl):
+	try:
+		ydl.__exit__(None, None, None)
+	except Exception as e:
+		print(f"Failed to close YoutubeDL instance: {e}")
+
+
+class YoutubeDLPool:
+	"""
+	Keeps YoutubeDL instances alive between calls, so option processing, extractor setup
+	and cookie parsing happen once per instance instead of once per call.
+	Instances are kept per (profile, cookies) and lent to one thread at a time.
+	When cookies.txt changes every idle instance is dropped and borrowed ones are closed on return.
+	"""
+	max_idle = 2 # per profile, more only exist while that many threads extract at once
+
+	def __init__(self, profiles):
+		self.profiles = profiles
+		self.lock = Lock()
+		self.idle = {} # (profile, cookies) -> [YoutubeDL]
+		self.signature = cookie_signature()
+		self.generation = 0
+
+	def create(self, profile, cookies):
+		import yt_dlp
+		opts = dict(self.profiles[profile])
+		if cookies:
+			opts.update(cookie_opts())
+		return yt_dlp.YoutubeDL(opts)
+
+	def check_cookies(self):
+		# Called with the lock held, returns the instances to close
+		signature = cookie_signature()
+		if signature == self.signature:
+			return []
+		stale = [ydl for instances in self.idle.values() for ydl in instances]
+		self.idle = {}
+		self.signature = signature
+		self.generation += 1
+		return stale
+
+	def close_all(self, instances):
+		for ydl in instances:
+			close_instance(ydl)
+		if instances:
+			# Closing writes the cookie jar back, that is not a change to react to
+			with self.lock:
+				self.signature = cookie_signature()
+
+	def acquire(self, profile, cookies=False):
+		# An instance for the caller alone until release(), for work that spans several calls such as a paged search
+		key = (profile, bool(cookies))
+		with self.lock:
+			stale = self.check_cookies()
+			instances = self.idle.get(key)
+			ydl = instances.pop() if instances else None
+			lease = (key, self.generation)
+		self.close_all(stale)
+		if ydl is None:
+			ydl = self.create(profile, cookies)
+		return ydl, lease
+
+	def release(self, ydl, lease):
+		key, generation = lease
+		with self.lock:
+			keep = generation == self.generation and len(self.idle.setdefault(key, [])) < self.max_idle
+			if keep:
+				self.idle[key].append(ydl)
+		if not keep:
+			self.close_all([ydl])
+
+	@contextmanager
+	def borrow(self, profile, cookies=False, **params):
+		ydl, lease = self.acquire(profile, cookies)
+		missing = object()
+		saved = {name: ydl.params.get(name, missing) for name in params}
+		ydl.params.update(params)
+		try:
+			yield ydl
+		finally:
+			for name, value in saved.items():
+				if value is missing:
+					ydl.params.pop(name, None)
+				else:
+					ydl.params[name] = value
+			self.release(ydl, lease)
+
+	def close(self):
+		with self.lock:
+			instances = [ydl for instances in self.idle.values() for ydl in instances]
+			self.idle = {}
+		self.close_all(instances)
+
+
+pool = YoutubeDLPool(PROFILES)
+
+
+class ExtractionCoordinator:
+	"""
+	Single flight for extractions: concurrent requests for the same key, (video, profile),
+	share one future instead of each going to the network. At most max_workers extractions run at once.
+	Requests can name an owner (the window that wants the result); cancel(owner) withdraws them,
+	and extractions nobody else is waiting for are dropped if they have not started yet.
+	"""
+	def __init__(self, max_workers=3):
+		self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extraction")
+		self.lock = Lock()
+		self.inflight = {} # key -> [future, owners]
+		self.started = 0
+		self.shared = 0
+
+	def submit(self, key, function, owner=None):
+		with self.lock:
+			entry = self.inflight.get(key)
+			if entry is not None and not entry[0].cancelled():
+				entry[1].append(owner)
+				self.shared += 1
+				return entry[0]
+			entry = [self.executor.submit(function), [owner]]
+			self.inflight[key] = entry
+			self.started += 1
+		entry[0].add_done_callback(lambda future: self.finished(key, entry))
+		return entry[0]
+
+	def finished(self, key, entry):
+		with self.lock:
+			if self.inflight.get(key) is entry:
+				del self.inflight[key]
+
+	def run(self, key, function, owner=None):
+		# Blocks until the shared extraction is done, raises what it raised (CancelledError when it was withdrawn)
+		return self.submit(key, function, owner).result()
+
+	def cancel(self, owner):
+		abandoned = []
+		with self.lock:
+			for entry in self.inflight.values():
+				if not any(o is owner for o in entry[1]):
+					continue
+				entry[1] = [o for o in entry[1] if o is not owner]
+				if not entry[1]:
+					abandoned.append(entry[0])
+		# Outside the lock, a cancelled future runs finished() right away. One already running can not be stopped
+		# and stays shared until it is done
+		for future in abandoned:
+			future.cancel()
+
+
+coordinator = ExtractionCoordinator()
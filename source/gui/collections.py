@@ -15,7 +15,7 @@ import time
 from download_handler.downloader import downloadAction
 import webbrowser
 import pyperclip
-import json
+from collection_handler import read_collection_name, iter_collection_items, write_collection
 
 class CollectionsManager(wx.Dialog):
 	def __init__(self, parent):
@@ -38,6 +38,7 @@ class CollectionsManager(wx.Dialog):
 		self.btnMenu = wx.Button(panel, -1, _("Context Menu"))
 		self.btnDelete = wx.Button(panel, -1, _("Delete"))
 		self.btnImport = wx.Button(panel, -1, _("Import..."))
+		self.btnSearch = wx.Button(panel, -1, _("Search Library"))
 		self.btnCreate = wx.Button(panel, -1, _("Create New"))
 		self.btnClose = wx.Button(panel, wx.ID_CANCEL, _("Close"))
 		
@@ -46,6 +47,7 @@ class CollectionsManager(wx.Dialog):
 		btnSizer.Add(self.btnCreate, 1, wx.ALL, 5)
 		btnSizer.Add(self.btnImport, 1, wx.ALL, 5)
 		btnSizer.Add(self.btnDelete, 1, wx.ALL, 5)
+		btnSizer.Add(self.btnSearch, 1, wx.ALL, 5)
 		
 		sizer.Add(lbl, 0, wx.ALL, 5)
 		sizer.Add(self.colList, 1, wx.EXPAND | wx.ALL, 5)
@@ -58,6 +60,7 @@ class CollectionsManager(wx.Dialog):
 		self.btnMenu.Bind(wx.EVT_BUTTON, self.onContext)
 		self.btnCreate.Bind(wx.EVT_BUTTON, self.onCreate)
 		self.btnImport.Bind(wx.EVT_BUTTON, self.onImport)
+		self.btnSearch.Bind(wx.EVT_BUTTON, self.onSearchLibrary)
 		self.btnDelete.Bind(wx.EVT_BUTTON, self.onDelete)
 		self.btnClose.Bind(wx.EVT_BUTTON, self.onClose)
 		
@@ -74,10 +77,8 @@ class CollectionsManager(wx.Dialog):
 
 	def load_collections(self):
 		self.colList.Clear()
-		self.collections = self.db.get_all_collections()
-		for col in self.collections:
-			count = self.db.get_collection_count(col['id'])
-			self.colList.Append(f"{col['name']} ({count} " + _("videos") + ")")
+		self.collections = self.db.get_overview() or []
+		self.colList.Set([f"{col['name']} ({col['count']} " + _("videos") + ")" for col in self.collections])
 		
 		if self.colList.Count > 0:
 			self.colList.Selection = 0
@@ -330,6 +331,8 @@ class CollectionsManager(wx.Dialog):
 			self.onClose(None)
 		elif event.KeyCode == wx.WXK_F2:
 			self.onRename(None)
+		elif event.KeyCode == ord("F") and event.ControlDown():
+			self.onSearchLibrary(None)
 		elif event.KeyCode in [wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER]:
 			# Check focus
 			obj = self.FindFocus()
@@ -341,16 +344,16 @@ class CollectionsManager(wx.Dialog):
 			event.Skip()
 
 
+	def onSearchLibrary(self, event):
+		from gui.library_search import LibrarySearch
+		LibrarySearch(self)
+
 	def onImport(self, event):
 		dlg = wx.FileDialog(self, _("Select Collection File"), wildcard="JSON files (*.json)|*.json", style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
 		if dlg.ShowModal() == wx.ID_OK:
 			path = dlg.GetPath()
 			try:
-				with open(path, 'r', encoding='utf-8') as f:
-					data = json.load(f)
-				
-				name = data.get('name', 'Imported Collection')
-				items = data.get('items', [])
+				name = read_collection_name(path) or 'Imported Collection'
 				
 				# Check if exists, if so prompt for new name
 				if any(c['name'] == name for c in self.collections):
@@ -367,32 +370,51 @@ class CollectionsManager(wx.Dialog):
 					wx.MessageBox(_("Failed to create collection. Name invalid or exists."), _("Error"), parent=self)
 					return
 					
-				count = 0
-				for item in items:
-					self.db.add_to_collection(col_id, item)
-					count += 1
-					
-				speak(_("Imported {} videos into '{}'").format(count, name))
-				self.load_collections()
-				# Select new
-				self.colList.Selection = self.colList.Count - 1
-				self.colList.SetFocus()
+				speak(_("Importing collection, please wait..."))
+				t = Thread(target=self._worker_import, args=(path, col_id, name))
+				t.daemon = True
+				t.start()
 				
 			except Exception as e:
 				wx.MessageBox(_("Error importing collection: {}").format(e), _("Error"), parent=self, style=wx.ICON_ERROR)
 		dlg.Destroy()
 
+	def _worker_import(self, path, col_id, name):
+		last_step = [0]
+		def progress(done, total):
+			# Announce every 10 percent of the file
+			step = int(done * 10 / total) if total else 10
+			if step > last_step[0] and step < 10:
+				last_step[0] = step
+				wx.CallAfter(speak, _("Importing {}%").format(step * 10))
+		try:
+			count = self.db.add_many(col_id, iter_collection_items(path, progress))
+			wx.CallAfter(self._on_import_done, name, count)
+		except Exception as e:
+			print(f"Import failed: {e}")
+			# Do not leave an empty collection behind
+			self.db.delete_collection(col_id)
+			wx.CallAfter(self._on_import_failed, e)
+
+	def _on_import_done(self, name, count):
+		speak(_("Imported {} videos into '{}'").format(count, name))
+		self.load_collections()
+		# Select new
+		for i, col in enumerate(self.collections):
+			if col['name'] == name:
+				self.colList.Selection = i
+				break
+		self.colList.SetFocus()
+
+	def _on_import_failed(self, error):
+		self.load_collections()
+		wx.MessageBox(_("Error importing collection: {}").format(error), _("Error"), parent=self, style=wx.ICON_ERROR)
+
 	def onExport(self, event):
 		sel = self.colList.Selection
 		if sel == wx.NOT_FOUND: return
 		
 		col = self.collections[sel]
-		items = self.db.get_collection_items(col['id'])
-		
-		data = {
-			"name": col['name'],
-			"items": items
-		}
 		
 		dlg = wx.FileDialog(self, _("Save Collection"), defaultFile=f"{col['name']}.json", wildcard="JSON files (*.json)|*.json", style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
 		if dlg.ShowModal() == wx.ID_OK:
@@ -400,8 +422,7 @@ class CollectionsManager(wx.Dialog):
 			if not path.lower().endswith(".json"):
 				path += ".json"
 			try:
-				with open(path, 'w', encoding='utf-8') as f:
-					json.dump(data, f, indent=4, ensure_ascii=False)
+				write_collection(path, col['name'], self.db.iter_items(col['id']) or [])
 				speak(_("Collection exported"))
 			except Exception as e:
 				wx.MessageBox(_("Error exporting collection: {}").format(e), _("Error"), parent=self, style=wx.ICON_ERROR)
@@ -436,21 +457,7 @@ class CollectionsManager(wx.Dialog):
 
 	def _worker_merge(self, source_col, target_col):
 		try:
-			# Create new DB instance or use existing? 
-			# Database module uses global connection with RLock, so it's thread-safe.
-			# But rigorous pattern suggests re-instantiating wrapper if needed.
-			# Converting to background task.
-			
-			source_items = self.db.get_collection_items(source_col['id'])
-			target_items = self.db.get_collection_items(target_col['id'])
-			target_urls = set(item['url'] for item in target_items)
-			
-			count = 0
-			for item in source_items:
-				if item['url'] not in target_urls:
-					self.db.add_to_collection(target_col['id'], item)
-					count += 1
-			
+			count = self.db.merge_into(source_col['id'], target_col['id'])
 			wx.CallAfter(speak, _("Merged {} videos from '{}' into '{}'").format(count, source_col['name'], target_col['name']))
 		except Exception as e:
 			print(f"Merge failed: {e}")
@@ -866,6 +873,8 @@ class AddToCollectionDialog(wx.Dialog):
 
 	def load_collections(self):
 		self.cols = self.db.get_all_collections()
+		# Collections holding this video, resolved once so moving through the list needs no queries
+		self.members = self.db.memberships(self.video_data['url']) or set()
 		self.colList.Clear()
 		for c in self.cols:
 			self.colList.Append(c['name'])
@@ -884,15 +893,8 @@ class AddToCollectionDialog(wx.Dialog):
 		
 		self.btnAction.Enable()
 		col = self.cols[sel]
-		is_in = self.db.is_in_collection(col['id'], self.video_data['url'])
-		
-		if is_in:
+		if col['id'] in self.members:
 			self.btnAction.SetLabel(_("Remove"))
-			# Find item id? No, logic needs to be cleaner.
-			# We need to know the item ID to remove it.
-			# But our `remove_from_collection` needs ID.
-			# We need a `remove_from_collection_by_url(col_id, url)`?
-			# Or we fetch it.
 		else:
 			self.btnAction.SetLabel(_("Add"))
 
@@ -923,21 +925,11 @@ class AddToCollectionDialog(wx.Dialog):
 		
 		if label == _("Add"):
 			self.db.add_to_collection(col['id'], self.video_data)
+			self.members.add(col['id'])
 			speak(_("Added to {}").format(col['name']))
 		else:
-			# Remove
-			# We need to implement remove by URL or fetch ID first
-			# DB doesn't have `remove_by_url`.
-			# We can do `con.execute("delete from collection_items where collection_id=? and url=?", ...)` manually?
-			# Or add method. Since I can't edit `database.py` easily again without overhead...
-			# Wait, I just edited `database.py`. I can use sqlite directly here via `get_collection_items` but that's slow.
-			# I should add `remove_from_collection_by_url` to `database.py`.
-			# Actually I can iterate items.
-			items = self.db.get_collection_items(col['id'])
-			for i in items:
-				if i['url'] == self.video_data['url']:
-					self.db.remove_from_collection(i['id'])
-					break
+			self.db.remove_by_url(col['id'], self.video_data['url'])
+			self.members.discard(col['id'])
 			speak(_("Removed"))
 		
 		# Do NOT close. Just update state.
@@ -23,3 +23,44 @@ class CustomButton(wx.Button):
 		else:
 			event.Skip()
 
+
+
+class VirtualList(wx.ListCtrl):
+	# a single column virtual list that only asks for the rows on screen
+	# exposes the parts of the wx.ListBox API the windows and the player rely on
+	def __init__(self, parent, id=-1, name=wx.ListCtrlNameStr, get_text=None):
+		wx.ListCtrl.__init__(self, parent, id, style=wx.LC_REPORT|wx.LC_VIRTUAL|wx.LC_SINGLE_SEL|wx.LC_NO_HEADER, name=name)
+		self.get_text = get_text
+		self.InsertColumn(0, name)
+		self.Bind(wx.EVT_SIZE, self.OnSize)
+
+	def OnSize(self, event):
+		self.SetColumnWidth(0, self.GetClientSize().width)
+		event.Skip()
+
+	def OnGetItemText(self, item, column):
+		try:
+			return self.get_text(item) if self.get_text else ""
+		except IndexError:
+			return ""
+
+	def GetCount(self):
+		return self.GetItemCount()
+
+	def GetSelection(self):
+		return self.GetFirstSelected()
+
+	def SetSelection(self, n):
+		current = self.GetFirstSelected()
+		if current != -1 and current != n:
+			self.Select(current, False)
+		if 0 <= n < self.GetItemCount():
+			self.Select(n)
+			self.Focus(n)
+			self.EnsureVisible(n)
+
+	Selection = property(GetSelection, SetSelection)
+
+	def SetCount(self, count):
+		self.SetItemCount(count)
+		self.Refresh()
@@ -29,6 +29,7 @@ class Favorites(wx.Frame):
 		self.menuButton = wx.Button(p, -1, _("Context Menu"), name="control")
 		self.deleteButton = wx.Button(p, -1, _("Remove from Favorites"), name="control")
 		self.clearButton = wx.Button(p, -1, _("Clear Favorites"), name="control")
+		self.searchButton = wx.Button(p, -1, _("Search Library"), name="control")
 		backButton = wx.Button(p, -1, _("Back to Main Window"), name="control")
 		self.favorites = Favorite()
 		self.rows = self.favorites.get_all()
@@ -62,6 +63,7 @@ class Favorites(wx.Frame):
 		self.menuButton.Bind(wx.EVT_BUTTON, self.onContextMenu)
 		self.deleteButton.Bind(wx.EVT_BUTTON, self.onDelete)
 		self.clearButton.Bind(wx.EVT_BUTTON, self.onClear)
+		self.searchButton.Bind(wx.EVT_BUTTON, self.onSearchLibrary)
 		backButton.Bind(wx.EVT_BUTTON, self.onBack)
 		self.Bind(wx.EVT_CLOSE, lambda e: wx.Exit())
 		self.Bind(wx.EVT_CHAR_HOOK, self.onHook)
@@ -255,6 +257,8 @@ class Favorites(wx.Frame):
 				self.onDelete(None)
 			elif obj == self.clearButton:
 				self.onClear(None)
+		elif event.KeyCode == ord("F") and event.ControlDown():
+			self.onSearchLibrary(None)
 		elif event.KeyCode == wx.WXK_BACK or event.KeyCode == wx.WXK_ESCAPE:
 			self.onBack(None)
 		elif event.KeyCode in (wx.WXK_DELETE, wx.WXK_NUMPAD_DELETE) and self.FindFocus() == self.favList:
@@ -265,6 +269,10 @@ class Favorites(wx.Frame):
 		else:
 			event.Skip()
 
+	def onSearchLibrary(self, event):
+		from gui.library_search import LibrarySearch
+		LibrarySearch(self)
+
 	def onBack(self, event):
 		self.caller.Show()
 		self.Destroy()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import wx
 import application
-from database import History
+from database import History, HistoryRows
+from .custom_controls import VirtualList
 from utiles import direct_download, get_audio_stream, get_video_stream
 from media_player.media_gui import MediaGui
 from nvda_client.client import speak
@@ -23,17 +24,18 @@ class HistoryWindow(wx.Frame):
 		from utiles import SilentPanel
 		p = SilentPanel(self)
 		l1 = wx.StaticText(p, -1, _("Watch History: "))
-		self.historyList = wx.ListBox(p, -1, name=_("Watch History"))
+		self.historyList = VirtualList(p, -1, name=_("Watch History"), get_text=lambda n: self.rows[n]["display_title"])
 		self.playButton = wx.Button(p, -1, _("Play"), name="control")
 		self.downloadButton = wx.Button(p, -1, _("Download"), name="control")
 		self.menuButton = wx.Button(p, -1, _("Context Menu"), name="control")
 		self.deleteButton = wx.Button(p, -1, _("Remove from History"), name="control")
 		self.clearButton = wx.Button(p, -1, _("Clear History"), name="control")
+		self.searchButton = wx.Button(p, -1, _("Search Library"), name="control")
 		backButton = wx.Button(p, -1, _("Back to Main Window"), name="control")
 		self.history = History()
-		self.rows = self.history.get_history()
-		self.historyList.Set([row["display_title"] for row in self.rows])
-		if self.historyList.Strings:
+		self.rows = HistoryRows(self.history)
+		self.historyList.SetCount(len(self.rows))
+		if self.rows:
 			self.historyList.Selection = 0
 			self.contextSetup()
 			swap = config_get("swap_play_hotkeys")
@@ -62,6 +64,7 @@ class HistoryWindow(wx.Frame):
 		self.menuButton.Bind(wx.EVT_BUTTON, self.onContextMenu)
 		self.deleteButton.Bind(wx.EVT_BUTTON, self.onDelete)
 		self.clearButton.Bind(wx.EVT_BUTTON, self.onClear)
+		self.searchButton.Bind(wx.EVT_BUTTON, self.onSearchLibrary)
 		backButton.Bind(wx.EVT_BUTTON, self.onBack)
 		self.Bind(wx.EVT_CLOSE, lambda e: wx.Exit())
 		self.Bind(wx.EVT_CHAR_HOOK, self.onHook)
@@ -70,9 +73,9 @@ class HistoryWindow(wx.Frame):
 		sizer.Fit(p)
 		self.Show()
 	def onShow(self, event):
-		self.rows = self.history.get_history()
-		self.historyList.Set([row["display_title"] for row in self.rows])
-		if self.historyList.Strings:
+		self.rows = HistoryRows(self.history)
+		self.historyList.SetCount(len(self.rows))
+		if self.rows:
 			self.historyList.Selection = 0
 		self.toggleControls()
 		self.historyList.SetFocus()
@@ -82,7 +85,7 @@ class HistoryWindow(wx.Frame):
 		if msg == wx.YES:
 			self.history.clear_history()
 			self.rows = []
-			self.historyList.Clear()
+			self.historyList.SetCount(0)
 			self.toggleControls()
 			speak(_("History cleared"))
 			self.playButton.SetFocus()
@@ -92,13 +95,10 @@ class HistoryWindow(wx.Frame):
 		if n == -1: return
 		url = self.rows[n]["url"]
 		self.history.remove_history(url)
-		self.historyList.Delete(n)
-		self.rows.pop(n)
+		self.rows.discard(n)
+		self.historyList.SetCount(len(self.rows))
 		self.toggleControls()
-		try:
-			self.historyList.Selection = n
-		except Exception:
-			pass
+		self.historyList.Selection = min(n, len(self.rows) - 1)
 		self.historyList.SetFocus()
 		speak(_("Removed from history"))
 
@@ -122,7 +122,7 @@ class HistoryWindow(wx.Frame):
 
 	def toggleControls(self):
 		for control in (self.playButton, self.downloadButton, self.menuButton, self.deleteButton, self.clearButton):
-			if self.rows == []:
+			if not self.rows:
 				control.Disable()
 
 	def contextSetup(self):
@@ -165,7 +165,7 @@ class HistoryWindow(wx.Frame):
 		self.Bind(wx.EVT_MENU, self.onOpenInBrowser, webbrowserItem)
 
 	def onContextMenu(self, event):
-		if self.rows != []:
+		if self.rows:
 			self.historyList.PopupMenu(self.contextMenu)
 
 	def onOpenInBrowser(self, event):
@@ -246,6 +246,8 @@ class HistoryWindow(wx.Frame):
 				self.onClear(None)
 			elif obj == self.deleteButton:
 				self.onDelete(None)
+		elif event.KeyCode == ord("F") and event.ControlDown():
+			self.onSearchLibrary(None)
 		elif event.KeyCode == wx.WXK_BACK or event.KeyCode == wx.WXK_ESCAPE:
 			self.onBack(None)
 		elif event.KeyCode in (wx.WXK_DELETE, wx.WXK_NUMPAD_DELETE) and self.FindFocus() == self.historyList:
@@ -256,6 +258,10 @@ class HistoryWindow(wx.Frame):
 		else:
 			event.Skip()
 
+	def onSearchLibrary(self, event):
+		from gui.library_search import LibrarySearch
+		LibrarySearch(self)
+
 	def onBack(self, event):
 		self.caller.Show()
 		self.Destroy()
@@ -0,0 +1,151 @@
+import wx
+import application
+import database
+from utiles import get_audio_stream, get_video_stream
+from media_player.media_gui import MediaGui
+from nvda_client.client import speak
+import pyperclip
+from .activity_dialog import LoadingDialog
+from settings_handler import config_get
+import webbrowser
+
+
+class LibrarySearch(wx.Frame):
+	# searches favorites, history and collections through the local full text index
+	def __init__(self, parent):
+		super().__init__(None, title=_("Search Library") + f" - {application.name}")
+		self.caller = parent
+		self.Centre()
+		self.SetSize(wx.DisplaySize())
+		from utiles import force_taskbar_style
+		force_taskbar_style(self)
+		self.Maximize(True)
+		from utiles import SilentPanel
+		p = SilentPanel(self)
+		l1 = wx.StaticText(p, -1, _("Search favorites, history and collections: "))
+		self.queryField = wx.TextCtrl(p, -1, name=_("Search"))
+		l2 = wx.StaticText(p, -1, _("Results: "))
+		self.libraryList = wx.ListBox(p, -1, name=_("Results"))
+		self.playButton = wx.Button(p, -1, _("Play"), name="control")
+		self.audioButton = wx.Button(p, -1, _("Play Audio"), name="control")
+		self.copyButton = wx.Button(p, -1, _("Copy Video Link"), name="control")
+		self.browserButton = wx.Button(p, -1, _("Open in Web Browser"), name="control")
+		backButton = wx.Button(p, -1, _("Back"), name="control")
+		self.rows = []
+		self.pending = None # debounce timer for typing
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		sizer.Add(l1)
+		sizer.Add(self.queryField, 0, wx.EXPAND)
+		sizer.Add(l2)
+		sizer.Add(self.libraryList, 1, wx.EXPAND)
+		ctrlSizer = wx.BoxSizer(wx.HORIZONTAL)
+		for control in p.GetChildren():
+			if control.Name == "control":
+				ctrlSizer.Add(control, 1)
+		sizer.Add(ctrlSizer)
+		self.toggleControls()
+
+		self.queryField.Bind(wx.EVT_TEXT, self.onText)
+		self.playButton.Bind(wx.EVT_BUTTON, lambda e: self.playVideo())
+		self.audioButton.Bind(wx.EVT_BUTTON, lambda e: self.playAudio())
+		self.copyButton.Bind(wx.EVT_BUTTON, self.onCopy)
+		self.browserButton.Bind(wx.EVT_BUTTON, self.onOpenInBrowser)
+		backButton.Bind(wx.EVT_BUTTON, self.onBack)
+		self.Bind(wx.EVT_CLOSE, lambda e: wx.Exit())
+		self.Bind(wx.EVT_CHAR_HOOK, self.onHook)
+		p.SetSizer(sizer)
+		sizer.Fit(p)
+		self.caller.Hide()
+		self.Show()
+		self.queryField.SetFocus()
+
+	def onText(self, event):
+		# Wait for a short pause in typing before querying
+		if self.pending is not None:
+			self.pending.Stop()
+		self.pending = wx.CallLater(250, self.search)
+
+	def search(self):
+		self.pending = None
+		query = self.queryField.Value
+		self.rows = database.search_library(query) or []
+		self.libraryList.Set([self.describe(row) for row in self.rows])
+		if self.rows:
+			self.libraryList.Selection = 0
+		self.toggleControls()
+		if query.strip():
+			speak(_("{} results").format(len(self.rows)))
+
+	def describe(self, row):
+		if row["source"] == "favorite":
+			source = _("Favorites")
+		elif row["source"] == "history":
+			source = _("History")
+		else:
+			source = _("Collection: {}").format(row["collection"])
+		channel = f", {row['channel_name']}" if row["channel_name"] else ""
+		return f"{row['display_title']}{channel} ({source})"
+
+	def toggleControls(self):
+		for control in (self.playButton, self.audioButton, self.copyButton, self.browserButton):
+			control.Enable(bool(self.rows))
+
+	def playVideo(self):
+		n = self.libraryList.Selection
+		if n == wx.NOT_FOUND: return
+		url = self.rows[n]["url"]
+		title = self.rows[n]["title"]
+		dlg = LoadingDialog(self, _("Playing"), get_video_stream, url)
+		if dlg.res:
+			gui = MediaGui(self, title, dlg.res, url, True if not self.rows[n]["live"] else False, self.rows)
+			self.Hide()
+
+	def playAudio(self):
+		n = self.libraryList.Selection
+		if n == wx.NOT_FOUND: return
+		url = self.rows[n]["url"]
+		title = self.rows[n]["title"]
+		dlg = LoadingDialog(self, _("Playing"), get_audio_stream, url)
+		if dlg.res:
+			gui = MediaGui(self, title, dlg.res, url, audio_mode=True, results=self.rows)
+			self.Hide()
+
+	def onCopy(self, event):
+		n = self.libraryList.Selection
+		if n == wx.NOT_FOUND: return
+		pyperclip.copy(self.rows[n]["url"])
+		wx.MessageBox(_("Link copied successfully"), _("Done"), parent=self)
+
+	def onOpenInBrowser(self, event):
+		n = self.libraryList.Selection
+		if n == wx.NOT_FOUND: return
+		webbrowser.open(self.rows[n]["url"])
+
+	def onHook(self, event):
+		obj = self.FindFocus()
+		if event.KeyCode in [wx.WXK_RETURN, wx.WXK_NUMPAD_ENTER]:
+			if obj == self.queryField:
+				# Search right away and move to the results
+				if self.pending is not None:
+					self.pending.Stop()
+				self.search()
+				if self.rows:
+					self.libraryList.SetFocus()
+			elif obj == self.libraryList:
+				swap = config_get("swap_play_hotkeys")
+				if event.ControlDown():
+					self.playVideo() if swap else self.playAudio()
+				else:
+					self.playAudio() if swap else self.playVideo()
+			else:
+				event.Skip()
+		elif event.KeyCode == wx.WXK_ESCAPE or (event.KeyCode == wx.WXK_BACK and obj != self.queryField):
+			self.onBack(None)
+		elif event.KeyCode == ord("K") and event.ControlDown():
+			self.onCopy(None)
+		else:
+			event.Skip()
+
+	def onBack(self, event):
+		self.caller.Show()
+		self.Destroy()
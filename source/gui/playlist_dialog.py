@@ -61,6 +61,7 @@ class PlaylistDialog(wx.Dialog):
 		self.Bind(wx.EVT_CLOSE, lambda e: wx.Exit())
 		self.Bind(wx.EVT_CLOSE, lambda e: wx.Exit())
 		
+		# Only the first page is waited for, the others are loaded when the end of the list is reached
 		dlg = LoadingDialog(self.Parent, _("Loading playlist"), PlaylistResult, self.url)
 		if dlg.res is None:
 			# Error handled by dialog
@@ -68,6 +69,7 @@ class PlaylistDialog(wx.Dialog):
 			return
 		
 		self.result = dlg.res
+		self.loading = False
 		self.title = self.result.title
 		self.SetTitle(f"{application.name} - {self.title}")
 		self.videosBox.Set(self.result.get_display_titles())
@@ -187,12 +189,11 @@ class PlaylistDialog(wx.Dialog):
 		if n != wx.NOT_FOUND:
 			# Update favorite checkbox
 			url = self.result.get_url(n)
-			# Do this in thread to keep UI snappy? Or direct db check is fast?
-			# DB check is fast enough usually.
+			# Answered from the in-memory membership index, no database round trip
 			fav = Favorite()
 			self.favCheckBox.SetValue(fav.is_favorite(url))
 
-		if n == self.videosBox.Count-1:
+		if n == self.videosBox.Count-1 and not self.loading:
 			def load():
 				try:
 					if self.result.next():
@@ -203,6 +204,9 @@ class PlaylistDialog(wx.Dialog):
 						speak(_("No more videos"))
 				except Exception as e:
 					speak(_("Could not load more videos"))
+				finally:
+					self.loading = False
+			self.loading = True
 			t = Thread(target=load)
 			t.daemon = True
 			t.start()
@@ -268,6 +272,7 @@ class PlaylistDialog(wx.Dialog):
 		self.PopupMenu(downloadMenu)
 		self.videosBox.SetFocus()
 	def back(self):
+		self.result.close()
 		self.Parent.Show()
 		self.Destroy()
 
@@ -59,6 +59,12 @@ class SettingsDialog(wx.Dialog):
 		self.chkPlayerNotifications = wx.CheckBox(playerOptions, -1, _("Speak player status notifications"), name="player_notifications")
 		self.chkPlayerNotifications.SetValue(config_get("player_notifications"))
 		
+		historyBox = wx.StaticBox(panel, -1, _("Watch history"))
+		lblHistoryRows = wx.StaticText(historyBox, -1, _("Maximum number of videos to keep (0 for unlimited): "))
+		self.historyMaxRows = wx.SpinCtrl(historyBox, -1, min=0, max=1000000, initial=int(config_get("history_max_rows")), name="history_max_rows")
+		lblHistoryDays = wx.StaticText(historyBox, -1, _("Remove videos not played for this many days (0 to keep them): "))
+		self.historyMaxDays = wx.SpinCtrl(historyBox, -1, min=0, max=3650, initial=int(config_get("history_max_days")), name="history_max_days")
+
 		cookiesBox = wx.StaticBox(panel, -1, _("YouTube Cookies (Fix Login/Bot errors)"))
 
 		
@@ -130,11 +136,16 @@ class SettingsDialog(wx.Dialog):
 		for ctrl in playerOptions.GetChildren():
 			sizer7.Add(ctrl, 1)
 		playerOptions.SetSizer(sizer7)
+		historySizer = wx.BoxSizer(wx.HORIZONTAL)
+		for ctrl in historyBox.GetChildren():
+			historySizer.Add(ctrl, 1)
+		historyBox.SetSizer(historySizer)
 		sizer.Add(sizer1, 1, wx.EXPAND)
 		sizer.Add(sizer2, 1, wx.EXPAND)
 		sizer.Add(preferencesBox, 1, wx.EXPAND)
 		sizer.Add(downloadPreferencesBox, 1, wx.EXPAND)
 		sizer.Add(playerOptions, 1, wx.EXPAND)
+		sizer.Add(historyBox, 1, wx.EXPAND)
 		sizer.Add(cookiesBox, 1, wx.EXPAND)
 		sizer.Add(dataBox, 1, wx.EXPAND)
 		
@@ -261,6 +272,16 @@ class SettingsDialog(wx.Dialog):
 		if not self.mp3Quality.Selection == int(config_get("conversion")):
 			config_set("conversion", self.mp3Quality.Selection)
 		config_set("defaultformat", self.formats.Selection) if not self.formats.Selection == int(config_get('defaultformat')) else None
+		retention_changed = False
+		for spin in (self.historyMaxRows, self.historyMaxDays):
+			if not spin.Value == int(config_get(spin.Name)):
+				config_set(spin.Name, spin.Value)
+				retention_changed = True
+		if retention_changed:
+			# Apply the new retention policy right away, off the UI thread
+			from database import History
+			from threading import Thread
+			Thread(target=History().prune, daemon=True).start()
 		# Check Skip Silence Change
 		# if "skip_silence" in self.preferences:
 		# 	restart = True # No longer needed with dynamic media options
@@ -6,15 +6,17 @@ from download_handler.downloader import downloadAction
 from nvda_client.client import speak
 from settings_handler import config_get, config_set
 import application
-from utiles import direct_download, get_audio_stream, get_video_stream, fetch_audio_tracks, BotDetectionError, get_related_videos
+from utiles import direct_download, BotDetectionError, get_related_videos, VideoInfo
 
 from gui.settings_dialog import SettingsDialog
 from gui.description import DescriptionDialog
-from gui.custom_controls import CustomButton
+from gui.custom_controls import CustomButton, VirtualList
 from youtube_browser.extras import Video
-from threading import Thread, Event
+from extraction_handler import coordinator
+from threading import Thread, Event, Lock
+from concurrent.futures import CancelledError
 import time
-from database import Continue, History, Favorite
+from database import Continue, History, HistoryRows, Favorite, flush
 from .analysis import detect_silence
 from .player import Player, State
 import random
@@ -66,6 +68,7 @@ class MediaGui(wx.Frame):
 		self.favorite = Favorite()
 		self.history_saved = False
 		self.video_data = None
+		self.video_info = None # VideoInfo of the current url, see current_info()
 
 
 		# Smart Navigation Init
@@ -81,30 +84,25 @@ class MediaGui(wx.Frame):
 		self.last_auto_next = 0 # Debounce timer
 		self.fetching_related = False
 		self.loading_track = False # Prevent spamming next/prev
+		self.loading_more = False # A page of the list is being loaded, see load_more()
+		self.load_more_lock = Lock()
 		self.last_load_warn = 0 # Debounce timer for user feedback
 		
 		# Thread Safety Flags
 		self.shutting_down = False
+		self.resume_ticks = 0 # Timer ticks, drives the resume point checkpoint
 		
 		# Prepare Video Data
 		self.timer = None
 		if self.results is not None:
 			try:
-				if hasattr(self.results, 'videos') and isinstance(self.results.videos, list):
+				if hasattr(self.results, 'videos'):
 					idx = 0
-					for i, v in enumerate(self.results.videos):
-						if v['url'] == self.url:
+					for i in range(len(self.results)):
+						if self.results.get_url(i) == self.url:
 							idx = i
 							break
-					vid = self.results.videos[idx]
-					self.video_data = {
-						"title": vid.get('title', ''),
-						"display_title": vid.get('title', ''),
-						"url": vid.get('url', ''),
-						"live": 0,
-						"channel_name": vid.get('channel', {}).get('name', ''),
-						"channel_url": vid.get('channel', {}).get('url', '')
-					}
+					self.video_data = self.playlist_video_data(idx)
 				elif hasattr(self.caller, 'searchResults'):
 					idx = self.caller.searchResults.Selection
 					self.video_data = {
@@ -117,18 +115,11 @@ class MediaGui(wx.Frame):
 					}
 				elif hasattr(self.caller, 'videosBox'): # Playlist
 					idx = self.caller.videosBox.Selection
-					vid = self.results.videos[idx]
-					self.video_data = {
-						"title": vid.get('title', ''),
-						"display_title": vid.get('title', ''),
-						"url": vid.get('url', ''),
-						"live": 0,
-						"channel_name": vid.get('channel', {}).get('name', ''),
-						"channel_url": vid.get('channel', {}).get('url', '')
-					}
-				elif hasattr(self.caller, 'favList') or hasattr(self.caller, 'historyList'):
-					idx = self.caller.favList.Selection if hasattr(self.caller, 'favList') else self.caller.historyList.Selection
-					self.video_data = self.results[idx]
+					self.video_data = self.playlist_video_data(idx)
+				elif hasattr(self.caller, 'favList') or hasattr(self.caller, 'historyList') or hasattr(self.caller, 'libraryList'):
+					idx = self.get_videos_box().Selection
+					# A plain dict like every other source, smart mode keeps it on the history stack
+					self.video_data = dict(self.results[idx])
 				elif hasattr(self.caller, 'videoList'): # CollectionView
 					idx = self.caller.videoList.Selection
 					# Collection items dict keys match video_data structure roughly but need verification
@@ -150,8 +141,8 @@ class MediaGui(wx.Frame):
 		if self.shuffle and self.results:
 			# Determine count
 			count = 0
-			if hasattr(self.results, 'videos') and isinstance(self.results.videos, list):
-				count = len(self.results.videos)
+			if hasattr(self.results, 'videos'):
+				count = len(self.results)
 			elif hasattr(self.caller, 'searchResults'):
 				count = self.caller.searchResults.GetCount()
 			elif hasattr(self.caller, 'videosBox'):
@@ -174,15 +165,15 @@ class MediaGui(wx.Frame):
 				# Re-acquiring `idx` safely.
 				current_real_idx = -1
 				
-				if hasattr(self.results, 'videos') and isinstance(self.results.videos, list):
-					for i, v in enumerate(self.results.videos):
-						if v['url'] == self.url:
+				if hasattr(self.results, 'videos'):
+					for i in range(len(self.results)):
+						if self.results.get_url(i) == self.url:
 							current_real_idx = i
 							break
 				else:
 					# Helper to get attributes safe
 					def get_box():
-						for attr in ['searchResults', 'videosBox', 'favList', 'historyList', 'videoList']:
+						for attr in ['searchResults', 'videosBox', 'favList', 'historyList', 'libraryList', 'videoList']:
 							if hasattr(self.caller, attr): return getattr(self.caller, attr)
 						return None
 					
@@ -535,6 +526,13 @@ class MediaGui(wx.Frame):
 			if length > 0:
 				self.timeSlider.SetRange(0, length)
 				self.timeSlider.SetValue(cur)
+
+			# Keep a recent resume point in memory and write it out every few ticks
+			if event is not None and self.player.media.get_state() == State.Playing:
+				Continue.set_position(self.url, self.player.media.get_position())
+				self.resume_ticks += 1
+				if self.resume_ticks % 15 == 0:
+					Continue.checkpoint()
 		else:
 			# Player is None (Loading or Stopped)
 			# Ensure slider is reset to "Nothing" state (0-100 placeholder or 0-0)
@@ -765,11 +763,13 @@ class MediaGui(wx.Frame):
 		self.onTimer(None)
 
 	def restore_playback_state(self):
-		if not (self.url in Continue.get_all() and config_get("continue")):
+		if not config_get("continue"):
+			return
+		data = Continue.get(self.url)
+		if data is None:
 			return
 		
 		try:
-			data = Continue.get_all()[self.url]
 			position = data.get("position", 0.0)
 			audio_track = data.get("audio_track", -1)
 			
@@ -795,6 +795,8 @@ class MediaGui(wx.Frame):
 
 	def closeAction(self):
 		self.shutting_down = True
+		# Queued preloads and lookups for this window are no longer wanted
+		coordinator.cancel(self)
 		if self.player is not None:
 			cur_pos = self.player.media.get_position()
 			# Save current Audio Track preference
@@ -806,20 +808,18 @@ class MediaGui(wx.Frame):
 			# I'll initializing it to "Default" or -1.
 			
 			track_val = -1
-			if self.url in Continue.get_all():
-				# Keep existing preference if we didn't change it?
-				# The issue: closeAction overwrites.
-				# So we scan `Continue` to get old value?
-				old_data = Continue.get_all()[self.url]
-				if "audio_track" in old_data:
-					track_val = old_data["audio_track"]
-
-			if cur_pos in (0.0, -1) and self.url in Continue.get_all():
-				Continue.remove_continue(self.url)
-			elif self.url in Continue.get_all():
-				Continue.update(self.url, cur_pos, track_val)
+			saved = Continue.get(self.url)
+			if saved is not None:
+				# Keep the audio track preference saved when it was switched
+				track_val = saved.get("audio_track", -1)
+
+			if cur_pos in (0.0, -1):
+				if saved is not None:
+					Continue.remove_continue(self.url)
 			else:
-				Continue.new_continue(self.url, cur_pos, track_val)
+				Continue.upsert(self.url, cur_pos, track_val)
+			# Commit the queued history and resume writes before the window goes away
+			flush()
 			self.player.media.stop()
 			self.player = None # Kill reference to prevent ghost threads usage
 		if self.timer:
@@ -1077,9 +1077,22 @@ class MediaGui(wx.Frame):
 		elif hasattr(self.caller, 'videosBox'): return self.caller.videosBox
 		elif hasattr(self.caller, 'favList'): return self.caller.favList
 		elif hasattr(self.caller, 'historyList'): return self.caller.historyList
+		elif hasattr(self.caller, 'libraryList'): return self.caller.libraryList
 		elif hasattr(self.caller, 'videoList'): return self.caller.videoList
 		return None
 
+	def playlist_video_data(self, index):
+		# History data for entry index of a playlist, read through get_title/get_url/get_channel
+		channel = self.results.get_channel(index) or {}
+		return {
+			"title": self.results.get_title(index) or '',
+			"display_title": self.results.get_title(index) or '',
+			"url": self.results.get_url(index) or '',
+			"live": 0,
+			"channel_name": channel.get('name', ''),
+			"channel_url": channel.get('url', '')
+		}
+
 	def sync_shuffle_ptr(self, index):
 		if not self.shuffle or not self.shuffle_indices: return
 		try:
@@ -1107,6 +1120,8 @@ class MediaGui(wx.Frame):
 				self.last_load_warn = curr
 			return
 		self.loading_track = True
+		# Extractions still queued for the track being left, preloads of its neighbours included, are no longer wanted
+		coordinator.cancel(self)
 
 		# Smart Mode / Direct Object handling
 		if isinstance(track, dict):
@@ -1152,7 +1167,7 @@ class MediaGui(wx.Frame):
 			
 		self.sync_shuffle_ptr(index)
 
-		if not isinstance(self.results, list):
+		if not isinstance(self.results, (list, HistoryRows)):
 			url = self.results.get_url(index)
 			title = self.results.get_title(index)
 			# Save History (Search/Playlist)
@@ -1169,15 +1184,7 @@ class MediaGui(wx.Frame):
 					if config_get("continue"):
 						self.history.add_history(data)
 				elif hasattr(self.caller, 'videosBox'): # Playlist
-					vid = self.results.videos[index]
-					data = {
-						"title": vid.get('title', ''),
-						"display_title": vid.get('title', ''),
-						"url": vid.get('url', ''),
-						"live": 0,
-						"channel_name": vid.get('channel', {}).get('name', ''),
-						"channel_url": vid.get('channel', {}).get('url', '')
-					}
+					data = self.playlist_video_data(index)
 					if config_get("continue"):
 						self.history.add_history(data)
 				elif hasattr(self.caller, 'videoList'): # Collection
@@ -1246,13 +1253,24 @@ class MediaGui(wx.Frame):
 			t.daemon = True
 			t.start()
 
-	def fetch_related(self, url):
+	def current_info(self):
+		# The one extraction behind the video being played: streams, audio tracks, description and related entries.
+		# Comes from the metadata cache when the stream was resolved a moment ago.
+		info = self.video_info
+		if info is None or info.url != self.url:
+			info = VideoInfo.get(self.url, owner=self)
+			self.video_info = info
+		return info
+
+	def fetch_related(self, url, video_info=None):
 		if not self.smart_mode: return
 		self.fetching_related = True
 		self.last_related_error = None # Reset error
 		try:
+			if video_info is None and url == self.url:
+				video_info = self.current_info()
 			# Not blocking main thread
-			related = get_related_videos(url)
+			related = get_related_videos(url, video_info)
 			if related:
 				self.related_videos = related
 				self.related_index = 0
@@ -1283,8 +1301,9 @@ class MediaGui(wx.Frame):
 			# Check Cache First (Safety)
 			# ... (Logic usually handled in changeTrack but check here too?)
 			
-			# 1. Get Stream
-			stream = get_video_stream(url) if not self.audio_mode else get_audio_stream(url)
+			# 1. Get Stream (the same extraction later serves audio tracks, description and related videos)
+			video_info = VideoInfo.get(url, owner=self)
+			stream = video_info.stream(self.audio_mode)
 			
 			# 2. Silence Analysis
 			start_time = 0.0
@@ -1298,17 +1317,24 @@ class MediaGui(wx.Frame):
 				except Exception as e:
 					print(f"Silence analysis failed: {e}")
 
+			self.video_info = video_info
 			self._finish_track_loading(stream, url, title, start_time, stop_time)
 			
 			if self.smart_mode:
 				# Add to session history
 				self.session_history.add(url)
-				t = Thread(target=self.fetch_related, args=(url,))
+				t = Thread(target=self.fetch_related, args=(url, video_info))
 				t.daemon = True
 				t.start()
 			
+		except CancelledError:
+			# Withdrawn because the window closed or another track was picked, there is nothing to report
+			if self.target_url == url:
+				self.loading_track = False
+			return
 		except Exception as e:
 			print(f"Error loading track: {e}")
+			if self.shutting_down: return
 			
 			# If stopped load manually?
 			# Check race condition
@@ -1361,11 +1387,15 @@ class MediaGui(wx.Frame):
 
 	def _finish_track_loading(self, stream_obj, url, title, start_time=None, stop_time=None):
 		self.stream = stream_obj
+		if url != self.url:
+			# Only the video being watched keeps a crash-safe resume point
+			Continue.discard(self.url)
 		self.url = url
 		self.title = title
 		
 		# Update UI
 		self.safe_call_after(self.SetTitle, f"{title} - {application.name}")
+		self.safe_call_after(self.chkFavorite.SetValue, self.favorite.is_favorite(url))
 		
 		# Start Player
 		try:
@@ -1506,7 +1536,7 @@ class MediaGui(wx.Frame):
 						cache_key = idx
 						if cache_key in self.track_cache: continue
 						
-						if not isinstance(self.results, list):
+						if not isinstance(self.results, (list, HistoryRows)):
 							url = self.results.get_url(idx)
 							title = self.results.get_title(idx)
 						else:
@@ -1520,8 +1550,8 @@ class MediaGui(wx.Frame):
 					
 					if not url: continue
 					
-					# Fetch Stream FIRST
-					stream = get_video_stream(url) if not self.audio_mode else get_audio_stream(url)
+					# Fetch Stream FIRST (shared with _load_and_play_track when both ask for the same video)
+					stream = VideoInfo.get(url, owner=self).stream(self.audio_mode)
 					
 					# Silence Analysis (Background)
 					start_time = 0.0
@@ -1634,7 +1664,7 @@ class MediaGui(wx.Frame):
 			if found_new:
 				# Push current to history
 				if self.video_data:
-					self.history_stack.append(self.video_data)
+					self.history_stack.append(dict(self.video_data))
 					
 				item = self.related_videos[self.related_index]
 				self.related_index += 1
@@ -1657,12 +1687,14 @@ class MediaGui(wx.Frame):
 			videosBox = self.caller.favList
 		elif hasattr(self.caller, 'historyList'):
 			videosBox = self.caller.historyList
+		elif hasattr(self.caller, 'libraryList'):
+			videosBox = self.caller.libraryList
 		elif hasattr(self.caller, 'videoList'):
 			videosBox = self.caller.videoList
 		else:
 			return
 
-		if not videosBox or not isinstance(videosBox, wx.ListBox): return
+		if not videosBox or not isinstance(videosBox, (wx.ListBox, VirtualList)): return
 		try:
 			if not videosBox.IsShownOnScreen() and not self.IsShown(): return # Basic visibility check
 		except Exception: pass # Window might be destroyed
@@ -1680,16 +1712,7 @@ class MediaGui(wx.Frame):
 				
 				# Load more logic
 				if index >= count - 2:
-					def load_more():
-						if hasattr(self.caller, 'searchResults'):
-							if self.results.load_more():
-								self.safe_call_after(self.caller.searchResults.Append, self.results.get_last_titles())
-						elif hasattr(self.caller, 'videosBox'): # Only playlist supports loading more
-							if self.results.next():
-								self.safe_call_after(self.caller.videosBox.Append, self.results.get_new_titles())
-					t = Thread(target=load_more)
-					t.daemon = True
-					t.start()
+					self.load_more()
 			else:
 				self.speak_status(_("No more videos"))
 		else:
@@ -1724,6 +1747,33 @@ class MediaGui(wx.Frame):
 				self.changeTrack(self.shuffle_indices[0])
 
 
+	def load_more(self):
+		# Loads the next page of the list being played, one page at a time.
+		# A playlist shares the flag of its dialog, which loads pages the same way on selection
+		owner = self.caller if hasattr(self.caller, 'videosBox') else self
+		attribute = 'loading' if owner is self.caller else 'loading_more'
+		with self.load_more_lock:
+			if getattr(owner, attribute, False): return
+			setattr(owner, attribute, True)
+
+		def load():
+			try:
+				if hasattr(self.caller, 'searchResults'):
+					if getattr(self.caller, 'streaming', False): return # The rest of the page is still being appended
+					if self.results.load_more():
+						self.safe_call_after(self.caller.searchResults.Append, self.results.get_last_titles())
+				elif hasattr(self.caller, 'videosBox'): # Only playlist supports loading more
+					if self.results.next():
+						self.safe_call_after(self.caller.videosBox.Append, self.results.get_new_titles())
+			except Exception as e:
+				print(f"Error loading more videos: {e}")
+			finally:
+				with self.load_more_lock:
+					setattr(owner, attribute, False)
+		t = Thread(target=load)
+		t.daemon = True
+		t.start()
+
 	def previous(self):
 		if not self.check_window_valid(): return
 
@@ -1750,6 +1800,8 @@ class MediaGui(wx.Frame):
 			videosBox = self.caller.favList
 		elif hasattr(self.caller, 'historyList'):
 			videosBox = self.caller.historyList
+		elif hasattr(self.caller, 'libraryList'):
+			videosBox = self.caller.libraryList
 		elif hasattr(self.caller, 'videoList'):
 			videosBox = self.caller.videoList
 		else:
@@ -1794,7 +1846,11 @@ class MediaGui(wx.Frame):
 		Thread(target=self.bg_fetch_audio).start()
 		
 	def bg_fetch_audio(self):
-		tracks = fetch_audio_tracks(self.url)
+		try:
+			tracks = self.current_info().secondary_audios
+		except Exception as e:
+			print(f"Error fetching audio tracks: {e}")
+			tracks = []
 		wx.CallAfter(self.show_audio_track_dialog, tracks)
 
 	def show_audio_track_dialog(self, tracks):
@@ -1832,10 +1888,7 @@ class MediaGui(wx.Frame):
 		
 		# Save preference
 		val = label if label != "Default" else -1
-		if self.url in Continue.get_all():
-			Continue.update(self.url, pos_pct, val)
-		else:
-			Continue.new_continue(self.url, pos_pct, val)
+		Continue.upsert(self.url, pos_pct, val)
 
 		# Restart Player
 		self.speak_status(_("Switched to") + f" {label}")
@@ -1957,7 +2010,11 @@ class MediaGui(wx.Frame):
 		Thread(target=self.bg_restore_audio, args=(label,)).start()
 
 	def bg_restore_audio(self, label):
-		tracks = fetch_audio_tracks(self.url)
+		try:
+			tracks = self.current_info().secondary_audios
+		except Exception as e:
+			print(f"Error fetching audio tracks: {e}")
+			tracks = []
 		# Find match
 		url = None
 		lang = None
@@ -1993,7 +2050,7 @@ class MediaGui(wx.Frame):
 		def extract_description():
 			try:
 				speak(_("Fetching video description"))
-				info = Video.getInfo(self.url)
+				info = Video.describe(self.current_info().metadata)
 			except Exception as e:
 				print(e)
 				speak(_("An error occurred while fetching video description"))
@@ -2006,7 +2063,7 @@ class MediaGui(wx.Frame):
 
 	def extract_description(self):
 		try:
-			info = Video.get(self.url)
+			info = Video.describe(self.current_info().metadata)
 		except Exception:
 			return
 		self.description = info['description']
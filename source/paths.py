@@ -2,4 +2,5 @@ import os
 
 settings_path = os.path.join(os.getenv("appdata"), "ddt.one", "A11YTube")
 update_path = os.path.join(settings_path, "updates")
-db_path = os.path.join(settings_path, "A11YTube.db")
\ No newline at end of file
+db_path = os.path.join(settings_path, "A11YTube.db")
+cache_path = os.path.join(settings_path, "cache.db")
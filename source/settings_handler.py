@@ -24,6 +24,9 @@ defaults = {
 	"speak_background": False,
 	"skip_silence": False,
 	"player_notifications": True,
+	"history_max_rows": 50000,
+	"history_max_days": 0,
+	"last_maintenance": 0,
 }
 
 from threading import RLock
@@ -7,7 +7,6 @@ import json
 import wx
 import application
 import os
-from paths import settings_path
 # import yt_dlp moved to local scopes
 
 class BotDetectionError(RuntimeError):
@@ -50,14 +49,27 @@ class Stream:
 		self.audio_url = audio_url
 		self.duration = 0 # Default
 
+	def as_dict(self):
+		return {
+			"url": self.url,
+			"title": self.title,
+			"extension": self.extension,
+			"resolution": self.resolution,
+			"http_headers": self.http_headers,
+			"secondary_audios": self.secondary_audios,
+			"audio_url": self.audio_url,
+			"duration": self.duration
+		}
+
+	@classmethod
+	def from_dict(cls, data):
+		s = cls(data["url"], data["title"], data.get("extension"), data.get("resolution"), data.get("http_headers"), data.get("secondary_audios"), data.get("audio_url"))
+		s.duration = data.get("duration") or 0
+		return s
+
 def get_cookie_opts():
-	path = os.path.join(settings_path, "cookies.txt")
-	if os.path.exists(path):
-		return {'cookiefile': path}
-	
-	if os.path.exists("cookies.txt"):
-		return {'cookiefile': "cookies.txt"}
-	return {}
+	from extraction_handler import cookie_opts
+	return cookie_opts()
 
 
 
@@ -136,119 +148,137 @@ def extract_secondary_audios(info):
 
 	return results
 
-def fetch_audio_tracks(url):
-	import yt_dlp
-	ydl_opts = {
-		'quiet': True,
-		'no_warnings': True,
-		'noplaylist': True
-	}
-	# Try without cookies first
-	try:
-		opts = ydl_opts.copy()
-		with yt_dlp.YoutubeDL(opts) as ydl:
-			info = ydl.extract_info(url, download=False)
-			return extract_secondary_audios(info)
-	except yt_dlp.utils.DownloadError as e:
-		if check_bot_error(str(e)):
-			# Retry with cookies
-			opts = ydl_opts.copy()
-			opts.update(get_cookie_opts())
-			try:
-				with yt_dlp.YoutubeDL(opts) as ydl:
-					info = ydl.extract_info(url, download=False)
-					return extract_secondary_audios(info)
-			except Exception:
-				return []
-	except Exception:
-		return []
+def best_audio_format(formats):
+	# yt-dlp sorts the formats it extracted from worst to best, so the last audio-only one is what bestaudio picks
+	for f in reversed(formats):
+		if f.get('acodec') != 'none' and f.get('vcodec') == 'none' and (f.get('manifest_url') or f.get('url')):
+			return f
+	return None
 
+class VideoInfo:
+	"""
+	What the player needs to know about one video, from a single extraction:
+	the audio and video streams chosen from the same format list, the secondary audio tracks,
+	and the stable metadata (title, description, tags, related entries).
+	Every part is also written to the metadata cache, so later lookups of any of them stay local.
+	"""
+	# The video stream is the format chosen by the "video stream" profile of the extraction pool,
+	# the audio stream the best audio-only format of the same list (the video stream when there is none)
 
+	def __init__(self, url, metadata, audio, video, secondary_audios):
+		self.url = url
+		self.metadata = metadata
+		self.audio = audio
+		self.video = video
+		self.secondary_audios = secondary_audios
+		self.title = metadata.get('title', 'Unknown')
+		self.description = metadata.get('description')
+		self.tags = metadata.get('tags') or []
+		self.duration = metadata.get('duration') or 0
+		self.related = metadata.get('related_videos') or metadata.get('recommendations') or metadata.get('suggested_videos') or []
+
+	def stream(self, audio_mode):
+		return self.audio if audio_mode else self.video
+
+	@classmethod
+	def get(cls, url, owner=None):
+		# From the cache when every part of it is still fresh, otherwise one extraction shared by everyone asking for it
+		from cache_handler import video_key
+		from extraction_handler import coordinator
+		info = cls.cached(url)
+		if info is not None:
+			return info
+		return coordinator.run((video_key(url), "video stream"), lambda: cls.cached(url) or cls.extract(url), owner)
+
+	@classmethod
+	def cached(cls, url):
+		from cache_handler import get_cache
+		cache = get_cache()
+		if cache is not None:
+			metadata = cache.get_metadata(url)
+			tracks = cache.get(url, "tracks")
+			if metadata and tracks is not None:
+				audio = cached_stream(url, "audio")
+				video = cached_stream(url, "video")
+				if audio and video:
+					return cls(url, metadata, audio, video, tracks)
+		return None
+
+	@classmethod
+	def extract(cls, url):
+		import yt_dlp
+		# First attempt: No cookies
+		try:
+			return cls.from_extraction(url, cookies=False)
+		except yt_dlp.utils.DownloadError as e:
+			# Check if error suggests authentication/cookie need
+			if check_bot_error(str(e)):
+				print(f"Auth needed: {e}")
+				if 'cookiefile' not in get_cookie_opts():
+					# No cookies found, but we need them
+					raise BotDetectionError(_("This video is age restricted or requires a valid cookies.txt file to play."))
+				try:
+					return cls.from_extraction(url, cookies=True)
+				except Exception as e2:
+					print(f"Retry failed: {e2}")
+					# If it still fails, it might be expired cookies or other issue
+					if check_bot_error(str(e2)):
+						raise BotDetectionError(_("Authentication failed. Your cookies.txt might be expired or invalid. Please delete and re-import a fresh one."))
+					raise e2
+			# If not auth error, raise original
+			raise e
+
+	@classmethod
+	def from_extraction(cls, url, cookies):
+		from extraction_handler import pool
+		from cache_handler import get_cache, trim_metadata, stream_cache, stream_ttl
+		with pool.borrow("video stream", cookies) as ydl:
+			info = ydl.extract_info(url, download=False)
+		audio_format = best_audio_format(info.get('formats') or [])
+		title = info.get('title', 'Unknown')
+		# The top level of the info dict is the video format picked by the options
+		video = Stream(info.get('manifest_url') or info['url'], title, info.get('ext'), info.get('resolution'), info.get('http_headers'))
+		video.duration = info.get('duration', 0)
+		if audio_format:
+			audio = Stream(audio_format.get('manifest_url') or audio_format['url'], title, audio_format.get('ext'), None, audio_format.get('http_headers') or info.get('http_headers'))
+			audio.duration = info.get('duration', 0)
+		else:
+			audio = video
+		result = cls(url, trim_metadata(info), audio, video, extract_secondary_audios(info))
+		cache = get_cache()
+		if cache is not None:
+			cache.put_metadata(info)
+		# Live manifests are not worth keeping around
+		if not info.get('is_live'):
+			for kind, stream in (("audio", audio), ("video", video)):
+				stream_cache.put(url, kind, stream)
+				ttl = stream_ttl(stream.url, stream.audio_url)
+				if cache is not None and ttl > 0:
+					cache.put(url, kind, stream.as_dict(), ttl)
+			ttl = stream_ttl(*(track['url'] for track in result.secondary_audios))
+			if cache is not None and ttl > 0:
+				cache.put(url, "tracks", result.secondary_audios, ttl)
+		return result
+
+def cached_stream(url, kind):
+	# A stream resolved earlier whose signed url is still good (memory first, then disk), None otherwise
+	from cache_handler import get_cache, stream_cache
+	s = stream_cache.get(url, kind)
+	if s is not None:
+		return s
+	cache = get_cache()
+	data = cache.get(url, kind) if cache is not None else None
+	if not data:
+		return None
+	s = Stream.from_dict(data)
+	stream_cache.put(url, kind, s)
+	return s
 
 def get_audio_stream(url):
-	import yt_dlp
-	ydl_opts = {
-		'format': 'bestaudio/best',
-		'quiet': True,
-		'no_warnings': True,
-		'noplaylist': True
-	}
-	# First attempt: No cookies
-	try:
-		# Copy default opts
-		opts = ydl_opts.copy()
-		with yt_dlp.YoutubeDL(opts) as ydl:
-			info = ydl.extract_info(url, download=False)
-			stream_url = info.get('manifest_url') if info.get('manifest_url') else info['url']
-			s = Stream(stream_url, info.get('title', 'Unknown'), info.get('ext'), None, info.get('http_headers'))
-			s.duration = info.get('duration', 0)
-			return s
-	except yt_dlp.utils.DownloadError as e:
-		# Check if error suggests authentication/cookie need
-		if check_bot_error(str(e)):
-			print(f"Auth needed for audio: {e}")
-			# Retry with cookies
-			opts = ydl_opts.copy()
-			opts.update(get_cookie_opts())
-			if 'cookiefile' not in opts:
-				# No cookies found, but we need them
-				raise BotDetectionError(_("This video is age restricted or requires a valid cookies.txt file to play."))
-			
-			try:
-				with yt_dlp.YoutubeDL(opts) as ydl:
-					info = ydl.extract_info(url, download=False)
-					stream_url = info.get('manifest_url') if info.get('manifest_url') else info['url']
-
-					s = Stream(stream_url, info.get('title', 'Unknown'), info.get('ext'), None, info.get('http_headers'))
-					s.duration = info.get('duration', 0)
-					return s
-			except Exception as e2:
-				# If it still fails, it might be expired cookies or other issue
-				if check_bot_error(str(e2)):
-					raise BotDetectionError(_("Authentication failed. Your cookies.txt might be expired or invalid. Please delete and re-import a fresh one."))
-				raise e2
-		# If not auth error, raise original
-		raise e
+	return cached_stream(url, "audio") or VideoInfo.get(url).audio
 
 def get_video_stream(url):
-	import yt_dlp
-	# Prioritize 720p (22) and 360p (18) progressive mp4 for compatibility
-	ydl_opts = {
-		'format': '22/18/best[ext=mp4]/best', 
-		'quiet': True,
-		'no_warnings': True,
-		'noplaylist': True
-	}
-	# First attempt: No cookies
-	try:
-		opts = ydl_opts.copy()
-		with yt_dlp.YoutubeDL(opts) as ydl:
-			info = ydl.extract_info(url, download=False)
-			stream_url = info.get('manifest_url') if info.get('manifest_url') else info['url']
-			s = Stream(stream_url, info.get('title', 'Unknown'), info.get('ext'), info.get('resolution'), info.get('http_headers'))
-			s.duration = info.get('duration', 0)
-			return s
-	except yt_dlp.utils.DownloadError as e:
-		if check_bot_error(str(e)):
-			print(f"Auth needed for video: {e}")
-			opts = ydl_opts.copy()
-			opts.update(get_cookie_opts())
-			if 'cookiefile' not in opts:
-				raise BotDetectionError(_("This video is age restricted or requires a valid cookies.txt file to play."))
-				
-			try:
-				with yt_dlp.YoutubeDL(opts) as ydl:
-					info = ydl.extract_info(url, download=False)
-					stream_url = info.get('manifest_url') if info.get('manifest_url') else info['url']
-					s = Stream(stream_url, info.get('title', 'Unknown'), info.get('ext'), info.get('resolution'), info.get('http_headers'))
-					s.duration = info.get('duration', 0)
-					return s
-			except Exception as e2:
-				print(f"Retry video failed: {e2}")
-				if check_bot_error(str(e2)):
-					raise BotDetectionError(_("Authentication failed. Your cookies.txt might be expired or invalid. Please delete and re-import a fresh one."))
-				raise e2
-		raise e
+	return cached_stream(url, "video") or VideoInfo.get(url).video
 
 def time_formatting( t):
 	try:
@@ -423,6 +453,21 @@ def force_taskbar_style(window):
 	except Exception as e:
 		print(f"Failed to force taskbar style: {e}")
 
+def idle_seconds():
+	# Time since the last keyboard or mouse input anywhere on the system
+	try:
+		import ctypes
+		class LASTINPUTINFO(ctypes.Structure):
+			_fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+		info = LASTINPUTINFO()
+		info.cbSize = ctypes.sizeof(info)
+		if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+			return 0
+		return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+	except Exception as e:
+		print(f"Failed to read idle time: {e}")
+		return 0
+
 def find_app_window(app_name_suffix):
 	import ctypes
 	best_hwnd = None
@@ -474,7 +519,7 @@ def get_youtube_mix(video_id):
 	Attempts to fetch the standard YouTube Mix (Radio) for a given video ID.
 	Mix URL format: https://www.youtube.com/watch?v={id}&list=RD{id}
 	"""
-	import yt_dlp
+	from extraction_handler import pool
 	mix_url = f"https://www.youtube.com/watch?v={video_id}&list=RD{video_id}"
 	print(f"Attempting to fetch YouTube Mix: {mix_url}")
 	
@@ -482,16 +527,8 @@ def get_youtube_mix(video_id):
 	try:
 		# We use extract_flat=True to get the list quickly. 
 		# YouTube Mixes are technically playlists.
-		opts = {
-			'quiet': True,
-			'ignoreerrors': True,
-			'extract_flat': True,
-			'no_warnings': True,
-			'playlistend': 20, # Fetch top 20 items from the mix
-		}
-		opts.update(get_cookie_opts())
-		
-		with yt_dlp.YoutubeDL(opts) as ydl:
+		# Fetch top 20 items from the mix
+		with pool.borrow("flat playlist", cookies=True, playlistend=20) as ydl:
 			info = ydl.extract_info(mix_url, download=False)
 			if info and 'entries' in info:
 				for vid in info['entries']:
@@ -528,8 +565,8 @@ def get_youtube_mix(video_id):
 	return results
 
 
-def get_related_videos(url):
-	import yt_dlp
+def get_related_videos(url, video_info=None):
+	from extraction_handler import pool
 	
 	results = []
 	current_id = None
@@ -540,17 +577,15 @@ def get_related_videos(url):
 	# Attempt 1: Direct Extraction (noplaylist=True might help specific versions)
 	# PRIORITY 1: Official Related Videos (Metadata) - The absolute truth
 	try:
-		opts = {
-			'quiet': True,
-			'ignoreerrors': True,
-			'noplaylist': True, # Try forcing single video mode
-			'extract_flat': False,
-			'no_warnings': True,
-		}
-		opts.update(get_cookie_opts())
-		
-		with yt_dlp.YoutubeDL(opts) as ydl:
-			info = ydl.extract_info(url, download=False)
+		# The player passes what it already extracted, other callers get it from the cache or one extraction
+		if video_info is None:
+			from cache_handler import get_cache
+			cache = get_cache()
+			info = cache.get_metadata(url) if cache is not None else None
+			if not info:
+				info = VideoInfo.get(url).metadata
+		else:
+			info = video_info.metadata
 		if info:
 			current_id = info.get('id')
 			current_title = info.get('title', '')
@@ -612,16 +647,7 @@ def get_related_videos(url):
 		try:
 			# Fetch recent videos from channel
 			# We use 'playlistend' to limit to 10
-			chan_opts = {
-				'quiet': True,
-				'ignoreerrors': True,
-				'extract_flat': True,
-				'no_warnings': True,
-				'playlistend': 10,
-			}
-			chan_opts.update(get_cookie_opts())
-			
-			with yt_dlp.YoutubeDL(chan_opts) as ydl:
+			with pool.borrow("flat playlist", cookies=True, playlistend=10) as ydl:
 				# Channel URL is treated as playlist
 				info = ydl.extract_info(current_channel_url, download=False)
 				if info and 'entries' in info:
@@ -721,15 +747,7 @@ def get_related_videos(url):
 		
 		try:
 			# Search for title, get 20 results (flat=True for speed)
-			search_opts = {
-				'quiet': True,
-				'ignoreerrors': True,
-				'extract_flat': True,
-				'no_warnings': True,
-			}
-			search_opts.update(get_cookie_opts())
-			
-			with yt_dlp.YoutubeDL(search_opts) as ydl:
+			with pool.borrow("flat playlist", cookies=True) as ydl:
 				# ytsearch20: more candidates to filter
 				info = ydl.extract_info(f"ytsearch20:{query}", download=False)
 				if info and 'entries' in info:
@@ -18,7 +18,7 @@ from nvda_client.client import speak
 from settings_handler import config_get
 from youtube_browser.search_handler import Search, PlaylistResult
 from utiles import direct_download, get_audio_stream, get_video_stream
-from database import Favorite, Collections
+from database import Favorite, Collections, membership
 
 
 class YoutubeBrowser(wx.Frame):
@@ -111,6 +111,7 @@ class YoutubeBrowser(wx.Frame):
 		else:
 			self.Destroy()
 		self.favorites = Favorite()
+		membership.subscribe(self.onMembershipChanged)
 		self.toggleFavorite()
 
 	def searchAction(self, value=""):
@@ -122,14 +123,20 @@ class YoutubeBrowser(wx.Frame):
 			return
 
 		
-		dlg = LoadingDialog(self, _("Searching"), Search, query, filter)
+		# The dialog only waits for the first result, the rest of the page is streamed into the list
+		dlg = LoadingDialog(self, _("Searching"), Search, query, filter, stream=True)
 		if dlg.res is None:
 			# Error handled by dialog
 			return
 		
+		if hasattr(self, "search"):
+			self.search.close()
 		self.search = dlg.res
-		titles = self.search.get_titles()
+		titles = [self.search.first] if self.search.first is not None else []
 		self.searchResults.Set(titles)
+		self.streaming = bool(titles)
+		if titles:
+			Thread(target=self.streamResults, args=[self.search], daemon=True).start()
 		self.toggleControls()
 		try:
 			self.searchResults.SetSelection(0)
@@ -384,13 +391,36 @@ class YoutubeBrowser(wx.Frame):
 	def onCopy(self, event):
 		pyperclip.copy(self.search.get_url(self.searchResults.Selection))
 		wx.MessageBox(_("Link copied successfully"), _("Done"), parent=self)
+	def streamResults(self, search):
+		# Appends the rest of the page in small batches while it is parsed
+		batch = []
+		try:
+			for title in search.stream:
+				batch.append(title)
+				if len(batch) >= 5:
+					wx.CallAfter(self.appendResults, search, batch)
+					batch = []
+		except Exception as e:
+			print(f"Search results stream failed: {e}")
+		wx.CallAfter(self.appendResults, search, batch, True)
+	def appendResults(self, search, titles, done=False):
+		if not self or search is not self.search:
+			return
+		if titles:
+			self.searchResults.Append(titles)
+		if done:
+			self.streaming = False
 	def loadMore(self):
-		if self.searchResults.Strings == []:
+		if self.searchResults.Strings == [] or self.streaming:
 			return
 		speak(_("Loading more results"))
-		if self.search.load_more() is None:
+		loaded = self.search.load_more()
+		if loaded is None:
 			speak(_("Could not load more results"))
 			return
+		if not loaded:
+			speak(_("No more videos"))
+			return
 		# position = self.searchResults.Selection
 		wx.CallAfter(self.searchResults.Append, self.search.get_last_titles())
 		speak(_("More search results loaded"))
@@ -413,6 +443,9 @@ class YoutubeBrowser(wx.Frame):
 		t.daemon = True
 		t.start()
 	def backAction(self):
+		membership.unsubscribe(self.onMembershipChanged)
+		if hasattr(self, "search"):
+			self.search.close()
 		self.Destroy()
 		self.caller.Show()
 	def toggleControls(self):
@@ -511,25 +544,17 @@ class YoutubeBrowser(wx.Frame):
 		if not self.favCheck.Enabled:
 			return
 		
-		url = self.search.get_url(n)
-		
-		def check_url(target_url):
-			# Use optimized DB check instead of fetching all
-			is_fav = self.favorites.is_favorite(target_url)
-			wx.CallAfter(self.updateFavCheck, is_fav, target_url)
+		# Answered from the in-memory membership index, cheap enough for every arrow key
+		self.favCheck.SetValue(self.favorites.is_favorite(self.search.get_url(n)))
 
-		t = Thread(target=check_url, args=[url])
-		t.daemon = True
-		t.start()
+	def onMembershipChanged(self, kind, url):
+		# Favorites may change from the player or another window while this one is open
+		if kind == "favorite":
+			wx.CallAfter(self.refreshFavorite)
 
-	def updateFavCheck(self, is_fav, check_url):
-		# Verify we are still on the same item
-		n = self.searchResults.Selection
-		if n == wx.NOT_FOUND: return
-		
-		current_url = self.search.get_url(n)
-		if current_url == check_url:
-			self.favCheck.SetValue(is_fav)
+	def refreshFavorite(self):
+		if self:
+			self.toggleFavorite()
 
 	def directDownload(self):
 		n = self.searchResults.Selection
@@ -725,17 +750,14 @@ class YoutubeBrowser(wx.Frame):
 			while pl.next():
 				pass # Just exhaust the generator/loader
 				
-			# Now we have all videos in pl.videos
-			count = 0
-			for vid in pl.videos:
-				data = {
-					"title": vid.get('title', ''),
-					"url": vid.get('url', ''),
-					"channel_name": vid.get('channel', {}).get('name', ''),
-					"channel_url": vid.get('channel', {}).get('url', '')
-				}
-				db.add_to_collection(col_id, data)
-				count += 1
+			# Now we have all videos in pl.videos, add the ones the collection does not have in one transaction
+			items = ({
+				"title": vid['title'] or '',
+				"url": vid['url'] or '',
+				"channel_name": vid['channel_name'] or '',
+				"channel_url": vid['channel_url'] or ''
+			} for vid in pl.videos)
+			count = db.add_many(col_id, items, skip_existing=True)
 				
 			wx.CallAfter(speak, _("Added {} videos to collection").format(count))
 			
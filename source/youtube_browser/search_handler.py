@@ -1,228 +1,384 @@
-from yt_dlp import YoutubeDL
-from utiles import time_formatting, get_cookie_opts
+from abc import ABC, abstractmethod
+from itertools import islice
+from sys import intern
+from threading import Lock
 
+from utiles import time_formatting
+from database import Row
+from extraction_handler import pool
+
+
+def format_views(views):
+	# View counts are kept as ints and only given their thousands separators when shown
+	return "{:,}".format(views) if views.__class__ is int else views
+
+
+class Result(Row):
+	__slots__ = ()
+	fields = ("type", "title", "url", "duration", "views", "elements", "channel_name", "channel_url")
+
+
+class ResultSet:
+	"""
+	Entries of a search or playlist kept column by column in parallel lists, instead of a dict per entry
+	with another dict for its channel. Channel names and urls repeat across a list and are interned,
+	so every entry of one channel shares the same strings.
+	Entries are read through the protocol MediaGui and the dialogs use (get_url(n), get_title(n), get_channel(n), len)
+	or as a Result record with results[n]; the display title of every entry is kept alongside.
+	"""
+	__slots__ = ("types", "titles", "urls", "durations", "views", "elements", "channel_names", "channel_urls", "display_titles")
+
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		for name in self.__slots__:
+			setattr(self, name, [])
+
+	def append(self, result, display_title):
+		type, title, url, duration, views, elements, channel_name, channel_url = result
+		self.types.append(type)
+		self.titles.append(title)
+		self.urls.append(url)
+		self.durations.append(duration)
+		self.views.append(views)
+		self.elements.append(elements)
+		self.channel_names.append(intern(channel_name) if channel_name.__class__ is str else channel_name)
+		self.channel_urls.append(intern(channel_url) if channel_url.__class__ is str else channel_url)
+		self.display_titles.append(display_title)
+
+	def __len__(self):
+		return len(self.urls)
+
+	def __bool__(self):
+		return bool(self.urls)
+
+	def __getitem__(self, n):
+		return Result((self.types[n], self.titles[n], self.urls[n], self.durations[n], self.views[n], self.elements[n], self.channel_names[n], self.channel_urls[n]))
+
+	def __iter__(self):
+		return map(Result, zip(self.types, self.titles, self.urls, self.durations, self.views, self.elements, self.channel_names, self.channel_urls))
+
+	def get_title(self, n):
+		return self.titles[n]
+
+	def get_url(self, n):
+		return self.urls[n]
+
+	def get_type(self, n):
+		return self.types[n]
+
+	def get_channel(self, n):
+		return {"name": self.channel_names[n], "url": self.channel_urls[n]}
+
+	def get_views(self, n):
+		return format_views(self.views[n])
+
+	def get_display_titles(self, start=0):
+		return self.display_titles[start:]
+
+
+class PagedResult(ABC):
+	"""
+	Results read page by page from one yt-dlp extraction. The url is extracted without processing,
+	which leaves its entries as yt-dlp's lazy generator: every page takes the next page_size entries from it,
+	so only the continuations not seen yet are requested. The generator keeps using the YoutubeDL instance
+	it came from, which is held until the entries run out or close() is called.
+	Subclasses open their url in start() and take pages with the lock held.
+	"""
+	profile = "flat search"
+	page_size = 30
+
+	def __init__(self):
+		self.limit = 0 # Entries taken so far
+		self.entries = None
+		self.exhausted = False
+		self.closed = False
+		self.ydl = None
+		self.lock = Lock()
+
+	@abstractmethod
+	def start(self):
+		pass
+
+	def open(self, url):
+		self.release()
+		self.ydl, self.lease = pool.acquire(self.profile, cookies=True)
+		try:
+			info = self.ydl.extract_info(url, download=False, process=False) or {}
+			# Links that only point elsewhere (a video in a playlist, a channel home page) are followed
+			while info.get('_type') in ('url', 'url_transparent'):
+				info = self.ydl.extract_info(info['url'], download=False, process=False) or {}
+		except Exception:
+			self.release()
+			raise
+		self.exhausted = False
+		self.entries = iter(info.get('entries') or [])
+		return info
+
+	def resume(self):
+		# The generator ended with the last error, a new one skips what is already listed
+		self.start()
+		self.entries = islice(self.entries, self.limit, None)
+
+	def take_page(self):
+		try:
+			page = list(islice(self.entries, self.page_size))
+		except Exception:
+			self.release()
+			raise
+		self.limit += len(page)
+		self.finish_page(len(page))
+		return page
+
+	def finish_page(self, taken):
+		if taken < self.page_size:
+			self.exhausted = True
+		if self.exhausted or self.closed:
+			self.release()
+
+	def release(self):
+		self.entries = None
+		if self.ydl is not None:
+			pool.release(self.ydl, self.lease)
+			self.ydl = None
+
+	def close(self):
+		# A page still being fetched stops after its current entry and gives the instance back itself
+		self.closed = True
+		if self.lock.acquire(blocking=False):
+			try:
+				self.release()
+			finally:
+				self.lock.release()
+
+
+class PlaylistResult(PagedResult):
+	profile = "flat playlist"
+	page_size = 100 # What YouTube sends per playlist continuation
 
-class PlaylistResult:
 	def __init__(self, url):
+		super().__init__()
 		self.url = url
-		self.videos = []
+		self.videos = ResultSet()
 		self.count = 0
-		self.ydl_opts = {
-			'extract_flat': True,
-			'quiet': True,
-			'ignoreerrors': True,
-		}
-		self.ydl_opts.update(get_cookie_opts())
-		self.parse()
-
-	def parse(self):
-		with YoutubeDL(self.ydl_opts) as ydl:
-			info = ydl.extract_info(self.url, download=False)
-			self.title = info.get('title', _("Unknown Playlist"))
-			if 'entries' in info:
-				for vid in info['entries']:
-					if not vid: continue
-					video = {
-						"title": vid.get("title", _("Unknown Title")),
-						"url": vid.get("url") if vid.get("url") else f"https://youtube.com/watch?v={vid.get('id')}",
-						"duration": time_formatting(str(int(vid.get("duration", 0)))) if vid.get("duration") else "",
-						"channel": {
-							"name": vid.get("uploader", _("Unknown Channel")),
-							"url": vid.get("uploader_url", "")
-						},
-					}
-					self.videos.append(video)
-		self.count = len(self.videos)
+		self.new_videos = 0
+		# Only the first page is loaded here, next() loads the others
+		with self.lock:
+			self.start()
+		self.next()
+
+	def start(self):
+		info = self.open(self.url)
+		self.title = info.get('title', _("Unknown Playlist"))
 
 	def next(self):
-		return False
+		# Loads the next page, False once the playlist has no more videos
+		with self.lock:
+			if self.closed or self.exhausted:
+				self.new_videos = 0
+				return False
+			if self.entries is None:
+				self.resume()
+			page = self.take_page()
+			for vid in page:
+				if not vid: continue
+				video = Result((
+					"video",
+					vid.get("title", _("Unknown Title")),
+					vid.get("url") if vid.get("url") else f"https://youtube.com/watch?v={vid.get('id')}",
+					vid.get("duration"),
+					None,
+					0,
+					vid.get("uploader", _("Unknown Channel")),
+					vid.get("uploader_url", "")
+				))
+				self.videos.append(video, self.display_title(video))
+			self.new_videos = len(self.videos) - self.count
+			self.count = len(self.videos)
+			return len(page) > 0
 
 	def get_new_titles(self):
-		titles = self.get_display_titles()
-		return titles
+		return self.videos.get_display_titles(len(self.videos) - self.new_videos) if self.new_videos > 0 else []
 
 	def get_title(self, n):
-		return self.videos[n]["title"]
+		return self.videos.get_title(n)
 
 	def get_display_titles(self):
-		titles = []
-		for vid in self.videos:
-			title = [vid['title'], _("Duration: {}").format(vid['duration']), f"{_('By')} {vid['channel']['name']}"]
-			titles.append(", ".join(title))
-		return titles
+		return self.videos.get_display_titles()
+
+	def display_title(self, vid):
+		duration = time_formatting(str(int(vid['duration']))) if vid['duration'] else ""
+		title = [vid['title'], _("Duration: {}").format(duration), f"{_('By')} {vid['channel_name']}"]
+		return ", ".join(title)
 
 	def get_url(self, n):
-		return self.videos[n]["url"]
+		return self.videos.get_url(n)
 
 	def get_channel(self, n):
-		return self.videos[n]["channel"]
+		return self.videos.get_channel(n)
+
+	def __len__(self):
+		return len(self.videos)
 
 
-class Search:
-	def __init__(self, query, filter=0):
+class Search(PagedResult):
+	page_size = 30
+
+	def __init__(self, query, filter=0, stream=False):
+		super().__init__()
 		self.query = query
 		self.filter = filter
-		self.results = {}
-		self.count = 1
-		self.limit = 30 # Initial batch size
-		self.ydl_opts = {
-			'extract_flat': 'in_playlist', 
-			'quiet': True,
-			'ignoreerrors': True,
-		}
-		self.ydl_opts.update(get_cookie_opts())
-		self.perform_search()
+		self.results = ResultSet()
+		self.new_videos = 0
+		self.taken = 0 # Entries taken by the last page, filtered ones included
+		if stream:
+			# Only the first result is waited for, the caller takes the rest of the page from self.stream
+			self.stream = self.iter_page()
+			self.first = next(self.stream, None)
+		else:
+			self.perform_search()
 
 	def perform_search(self, load_more=False):
+		for title in self.iter_page(load_more):
+			pass
+		return self.taken > 0
+
+	def iter_page(self, load_more=False):
+		# Each new result is parsed, stored and its display title yielded as soon as it arrives.
+		# The search stays locked until the page is done, even when it is finished from another thread
+		with self.lock:
+			self.new_videos = 0
+			self.taken = 0
+			if not load_more:
+				self.limit = 0
+				self.closed = False
+				self.start()
+				self.results.clear()
+			elif self.closed or self.exhausted:
+				return
+			elif self.entries is None:
+				self.resume()
+			try:
+				for result in islice(self.entries, self.page_size):
+					self.taken += 1
+					entry = self.parse_entry(result)
+					if entry is not None:
+						title = self.display_title(entry)
+						self.results.append(entry, title)
+						self.new_videos += 1
+						yield title
+					if self.closed:
+						break
+			except Exception:
+				self.release()
+				raise
+			finally:
+				self.limit += self.taken
+			self.finish_page(self.taken)
+
+	def start(self):
 		search_query = self.query
-		
-		# Update items limit
-		# For direct string search (video), we use ytsearchN:
-		# For URL search (playlist), we use --playlist-end N (via separate opt, but passing it in ydl_opts is cleaner)
-		
-		current_opts = self.ydl_opts.copy()
-		
 		if self.filter == 1:
 			import urllib.parse
 			encoded_query = urllib.parse.quote(search_query)
 			search_query = f"https://www.youtube.com/results?search_query={encoded_query}&sp=EgIQAw%3D%3D"
-			# Limit results for URL search
-			current_opts['playlistend'] = self.limit
 		else:
-			# Use ytsearch with limit
-			search_query = f"ytsearch{self.limit}:{search_query}"
-
-		with YoutubeDL(current_opts) as ydl:
-			info = ydl.extract_info(search_query, download=False)
-			if 'entries' in info:
-				self.parse_entries(info['entries'], load_more)
+			search_query = f"ytsearchall:{search_query}"
+		self.open(search_query)
 
-	def parse_entries(self, entries, load_more=False):
-		if not load_more: 
-			self.results = {}
-			self.count = 1
+	def parse_entry(self, result):
+		if not result: return None
 
-		temp_count = 1 # Always start internal counting from 1, matching the dict keys
+		res_type = "video"
+		if result.get("_type") == "playlist" or result.get("ie_key") == "YoutubeTab":
+			res_type = "playlist"
+		elif result.get("url") and "playlist" in result.get("url"): 
+			res_type = "playlist"
 		
-		# If loading more, we need to skip the ones we already have, OR just re-populate everything.
-		# yt-dlp returns the whole list [0...N].
-		# Re-populating is safer to ensure order, but we can optimize by just updating.
-		# Given the dictionary structure self.results[temp_count], we can just overwrite.
+		# Filter Logic
+		if self.filter == 1 and res_type != "playlist":
+			return None
+
+		views = None
+		if result.get("view_count"):
+			try:
+				views = int(result.get("view_count"))
+			except Exception:
+				views = str(result.get("view_count"))
+
+		# Robust parsing for different yt-dlp versions/response formats
+		channel_name = result.get("uploader") or result.get("channel")
+		channel_url = result.get("uploader_url") or result.get("channel_url") or ""
 		
-		current_items = 0
+		vid_count = result.get("playlist_count") or result.get("video_count") or 0
 		
-		for result in entries:
-			if not result: continue
-			current_items += 1
-			
-			res_type = "video"
-			if result.get("_type") == "playlist" or result.get("ie_key") == "YoutubeTab":
-				res_type = "playlist"
-			elif result.get("url") and "playlist" in result.get("url"): 
-				res_type = "playlist"
-			
-			# Filter Logic
-			if self.filter == 1 and res_type != "playlist":
-				continue
+		url = result.get("url")
+		if not url and result.get("id"):
+			if res_type == "playlist":
+				url = f"https://www.youtube.com/playlist?list={result.get('id')}"
+			else:
+				url = f"https://www.youtube.com/watch?v={result.get('id')}"
 
-			duration_str = ""
-			if result.get("duration"):
-				duration_str = time_formatting(str(int(result.get("duration"))))
-			
-			views_str = None
-			if result.get("view_count"):
-				try:
-					views_str = "{:,}".format(int(result.get("view_count")))
-				except Exception:
-					views_str = str(result.get("view_count"))
-
-			# Robust parsing for different yt-dlp versions/response formats
-			channel_name = result.get("uploader") or result.get("channel")
-			channel_url = result.get("uploader_url") or result.get("channel_url") or ""
-			
-			vid_count = result.get("playlist_count") or result.get("video_count") or 0
-			
-			url = result.get("url")
-			if not url and result.get("id"):
-				if res_type == "playlist":
-					url = f"https://www.youtube.com/playlist?list={result.get('id')}"
-				else:
-					url = f"https://www.youtube.com/watch?v={result.get('id')}"
-
-			entry = {
-				"type": res_type,
-				"title": result.get("title", _("Unknown")),
-				"url": url,
-				"duration": result.get("duration"),
-				"duration_formatted": duration_str, 
-				"elements": vid_count, 
-				"channel": {
-					"name": channel_name,
-					"url": channel_url
-				},
-				"views": views_str
-			}
-			self.results[temp_count] = entry
-			temp_count += 1
-		
-		self.new_videos = temp_count - self.count
-		self.count = temp_count
+		return Result((res_type, result.get("title", _("Unknown")), url, result.get("duration"), views, vid_count, channel_name, channel_url))
 
 	def get_titles(self):
-		titles = []
-		sorted_keys = sorted(self.results.keys())
-		for k in sorted_keys:
-			data = self.results[k]
-			title = [data['title']]
-			
-			# Info parts construction
-			info_parts = []
-			
-			if data["type"] == "video":
-				dur = self.get_duration(data['duration'])
-				if dur: info_parts.append(dur)
-					
-				if data['channel']['name']:
-					info_parts.append(f"{_('By')} {data['channel']['name']}")
-					
-				views = self.views_part(data['views'])
-				if views: info_parts.append(views)
-
-			elif data["type"] == "playlist":
-				info_parts.append(_("Playlist"))
+		return self.results.get_display_titles()
+
+	def display_title(self, data):
+		title = [data['title']]
+		
+		# Info parts construction
+		info_parts = []
+		
+		if data["type"] == "video":
+			dur = self.get_duration(data['duration'])
+			if dur: info_parts.append(dur)
+				
+			if data['channel_name']:
+				info_parts.append(f"{_('By')} {data['channel_name']}")
 				
-				if data['channel']['name']:
-					info_parts.append(f"{_('By')} {data['channel']['name']}")
+			views = self.views_part(format_views(data['views']))
+			if views: info_parts.append(views)
+
+		elif data["type"] == "playlist":
+			info_parts.append(_("Playlist"))
 			
-			title.extend(info_parts)
-			titles.append(", ".join([element for element in title if element != ""]))
-		return titles
+			if data['channel_name']:
+				info_parts.append(f"{_('By')} {data['channel_name']}")
+		
+		title.extend(info_parts)
+		return ", ".join([element for element in title if element != ""])
 
 	def get_last_titles(self):
-		titles = self.get_titles()
 		if self.new_videos > 0:
-			return titles[-self.new_videos:]
+			return self.results.get_display_titles(len(self.results) - self.new_videos)
 		return []
 
 	def get_title(self, number):
-		return self.results[number+1]["title"]
+		return self.results.get_title(number)
 	def get_url(self, number):
-		return self.results[number+1]["url"]
+		return self.results.get_url(number)
 	def get_type(self, number):
-		return self.results[number+1]["type"]
+		return self.results.get_type(number)
 	def get_channel(self, number):
-		return self.results[number+1]["channel"]
+		return self.results.get_channel(number)
+	def __len__(self):
+		return len(self.results)
 
 	def load_more(self):
-		self.limit += 30
-		self.perform_search(load_more=True)
-		return True 
+		# None when the next page could not be fetched, False when the search has no more results
+		try:
+			return self.perform_search(load_more=True)
+		except Exception as e:
+			print(f"Failed to load more results: {e}")
+			return None
 
 	def parse_views(self, string):
 		return string
 
 	def get_views(self, number):
-		return self.results[number+1]['views']
+		return self.results.get_views(number)
 
 	def views_part(self, data):
 		if data is not None:
@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from collection_handler import CollectionReader
+
+
+class CollectionReaderTest(unittest.TestCase):
+	def setUp(self):
+		self.data = {
+			"name": "Music",
+			"version": 1.25,
+			"exported": 1.5e+3,
+			"items": [
+				{"title": "Video 1", "url": "https://www.youtube.com/watch?v=00000000001", "position": 0.75},
+				{"title": "Video 2", "url": "https://www.youtube.com/watch?v=00000000002", "position": 12},
+			],
+			"count": 2,
+		}
+		fd, self.path = tempfile.mkstemp(suffix=".json")
+		with os.fdopen(fd, "w", encoding="utf-8") as file:
+			json.dump(self.data, file)
+
+	def tearDown(self):
+		os.remove(self.path)
+
+	def read(self, chunk_size):
+		data = {"items": []}
+		for key, value in CollectionReader(self.path, chunk_size=chunk_size).events():
+			if key == "item":
+				data["items"].append(value)
+			else:
+				data[key] = value
+		return data
+
+	def test_numbers_split_across_chunks(self):
+		# Every chunk size small enough to cut the numbers after their digits, "." and "e"
+		for chunk_size in range(1, 40):
+			with self.subTest(chunk_size=chunk_size):
+				self.assertEqual(self.read(chunk_size), self.data)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,170 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from threading import Event, Thread
+
+tmp = tempfile.mkdtemp(prefix="a11ytube_test_")
+os.environ["APPDATA"] = os.environ["appdata"] = tmp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+
+from paths import settings_path, db_path
+os.makedirs(settings_path, exist_ok=True)
+import database
+
+
+class MembershipIndexTest(unittest.TestCase):
+	def setUp(self):
+		database.disconnect()
+		for suffix in ("", "-wal", "-shm"):
+			if os.path.exists(db_path + suffix):
+				os.remove(db_path + suffix)
+		self.collections = database.Collections()
+		self.source = self.collections.create_collection("Source")
+		self.target = self.collections.create_collection("Target")
+		self.collections.add_many(self.source, [{"title": f"Video {i}", "url": f"https://www.youtube.com/watch?v={i:011d}"} for i in range(3)])
+
+	def tearDown(self):
+		database.disconnect()
+
+	def test_lookup_during_bulk_write_does_not_deadlock(self):
+		# A reader with a queued write loads the index (syncing the queue, so waiting for the write lock)
+		# while a bulk writer holding the write lock updates the index
+		writer_holds_lock = Event()
+		reader_started = Event()
+		results = {}
+
+		def writer():
+			with database.manager.write_lock:
+				writer_holds_lock.set()
+				reader_started.wait(5)
+				time.sleep(0.2) # let the reader reach the write lock
+				results["merged"] = self.collections.merge_into(self.source, self.target)
+
+		def reader():
+			writer_holds_lock.wait(5)
+			item_id = self.collections.get_collection_items(self.source)[0]["id"]
+			self.collections.remove_from_collection(item_id)
+			reader_started.set()
+			results["member"] = self.collections.is_in_collection(self.source, "https://www.youtube.com/watch?v=00000000001")
+
+		threads = [Thread(target=writer, daemon=True), Thread(target=reader, daemon=True)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join(10)
+		self.assertFalse(any(thread.is_alive() for thread in threads), "membership lookup and bulk write deadlocked")
+		self.assertTrue(results["member"])
+
+	def test_load_racing_a_change_is_not_kept(self):
+		url = "https://www.youtube.com/watch?v=00000000009"
+		membership = database.membership
+		load = membership.load_favorites
+
+		def racing_load():
+			data = load()
+			# A favorite added after the map was read, before it is swapped in
+			database.Favorite().add_favorite({"title": "Video", "display_title": "Video", "url": url, "live": 0, "channel_name": "", "channel_url": ""})
+			return data
+
+		membership.load_favorites = racing_load
+		try:
+			membership.is_favorite(url)
+		finally:
+			del membership.load_favorites
+		self.assertIsNone(membership.favorites)
+		self.assertTrue(membership.is_favorite(url))
+
+
+class ContinueTest(unittest.TestCase):
+	def setUp(self):
+		database.disconnect()
+		for suffix in ("", "-wal", "-shm"):
+			if os.path.exists(db_path + suffix):
+				os.remove(db_path + suffix)
+		database.Continue.cache.clear()
+		database.Continue.dirty.clear()
+		database.Continue.previous.clear()
+
+	def tearDown(self):
+		database.disconnect()
+
+	def test_checkpointed_position_is_deleted_when_moving_on(self):
+		url = "https://www.youtube.com/watch?v=00000000001"
+		database.Continue.set_position(url, 0.5)
+		database.Continue.checkpoint()
+		database.flush()
+		self.assertEqual(database.Continue.load(url)["position"], 0.5)
+		database.Continue.discard(url)
+		database.flush()
+		self.assertIsNone(database.Continue.load(url))
+		self.assertIsNone(database.Continue.get(url))
+
+	def test_earlier_session_position_is_restored_when_moving_on(self):
+		url = "https://www.youtube.com/watch?v=00000000003"
+		database.Continue.upsert(url, 0.5, audio_track=2)
+		database.flush()
+		# A later session plays the same video past a checkpoint, then moves on
+		database.Continue.cache.clear()
+		database.Continue.set_position(url, 0.9)
+		database.Continue.checkpoint()
+		database.flush()
+		self.assertEqual(database.Continue.load(url)["position"], 0.9)
+		database.Continue.discard(url)
+		database.flush()
+		self.assertEqual(database.Continue.load(url), {"position": 0.5, "audio_track": 2})
+		self.assertEqual(database.Continue.get(url), {"position": 0.5, "audio_track": 2})
+
+	def test_saved_position_survives_moving_on(self):
+		url = "https://www.youtube.com/watch?v=00000000002"
+		database.Continue.upsert(url, 0.25)
+		database.Continue.discard(url)
+		database.flush()
+		self.assertEqual(database.Continue.get(url)["position"], 0.25)
+
+	def test_cache_is_bounded(self):
+		for i in range(database.Continue.max_entries + 50):
+			database.Continue.get(f"https://www.youtube.com/watch?v={i:011d}")
+		self.assertEqual(len(database.Continue.cache), database.Continue.max_entries)
+
+
+class AddManyTest(unittest.TestCase):
+	def setUp(self):
+		database.disconnect()
+		for suffix in ("", "-wal", "-shm"):
+			if os.path.exists(db_path + suffix):
+				os.remove(db_path + suffix)
+		self.collections = database.Collections()
+		self.collection = self.collections.create_collection("Import")
+		self.collections.batch_size = 3
+
+	def tearDown(self):
+		database.disconnect()
+
+	def test_writes_run_while_items_are_read(self):
+		flushed = []
+
+		def items():
+			for i in range(10):
+				if i == 5:
+					# Another thread commits its queued writes while the import reads its next batch
+					database.Continue.save("https://www.youtube.com/watch?v=00000000099", 0.5, -1)
+					thread = Thread(target=lambda: flushed.append(database.flush()), daemon=True)
+					thread.start()
+					thread.join(5)
+				yield {"title": f"Video {i}", "url": f"https://www.youtube.com/watch?v={i:011d}"}
+
+		self.assertEqual(self.collections.add_many(self.collection, items()), 10)
+		self.assertEqual(flushed, [None])
+		self.assertEqual(len(self.collections.get_collection_items(self.collection)), 10)
+
+	def test_skip_existing_across_batches(self):
+		urls = [f"https://www.youtube.com/watch?v={i % 4:011d}" for i in range(10)]
+		count = self.collections.add_many(self.collection, ({"title": "Video", "url": url} for url in urls), skip_existing=True)
+		self.assertEqual(count, 4)
+		self.assertEqual([item["url"] for item in self.collections.get_collection_items(self.collection)], sorted(set(urls)))
+
+
+if __name__ == "__main__":
+	unittest.main()